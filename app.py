@@ -1,274 +1,41 @@
 import streamlit as st
-import pandas as pd
-from datetime import datetime
+
+from kyodai.engine import faculty_verdict
+from kyodai.history import PAGE_SIZE as HISTORY_PAGE_SIZE, HistoryRecord, display_row
+from kyodai.montecarlo import simulate_pass
+from kyodai.optimizer import best_allocation, frontier
+from kyodai.passdist import get_distribution
+from kyodai.profiling import debug_login, get_profiler, render_sidebar, timed
+from kyodai.ui import (
+    center_score_form, history_owner_id, history_resume_form, load_history_store, load_table, year_selector,
+)
+
+st.set_page_config(page_title="合格判定シミュレーター", layout="centered")
+
+# 計測 (KYODAI_PROFILE=1、または ?debug=1 + 管理者トークンのときだけ有効)
+debug_login()
+prof = get_profiler()
+prof.begin()
+prof.section("setup")
 
 # ==========================================
 # 0. セッション状態の初期化
 # ==========================================
-if 'history' not in st.session_state:
-    st.session_state['history'] = []
+# 履歴は SQLite に保存し、セッションごとの持ち主 ID で識別する (続きは 5. の続きコードで引き継ぐ)
+history_store = load_history_store()
+history_owner = history_owner_id()
 
 # ==========================================
-# 1. データ定義 (2026年度 令和8年度入試対応・完全版)
+# 1. データ定義 (kyodai/datasets/<年度>.json をコンパイルしたスナップショット)
 # ==========================================
-UNIVERSITY_DATA = {
-    # ---------------------------------------------------------
-    # 京都大学 (文系)
-    # ---------------------------------------------------------
-    "京都大学 (文系)": {
-        "法学部": {
-            "center_max": 285, "secondary_max": 600,
-            "secondary_subjects": {"国語": 150, "数学": 150, "英語": 200, "地歴": 100},
-            "weights": {"jap": 0.3, "math": 0.3, "eng": 0.3, "soc": 0.3, "sci": 0.3, "info": 0.15},
-            "pass_score_mean": 560,
-            "eng_rule": "kyodai_special"
-        },
-        "経済学部 (文系)": {
-            "center_max": 300, "secondary_max": 550,
-            "secondary_subjects": {"国語": 150, "数学": 150, "英語": 150, "地歴": 100},
-            "weights": {"jap": 0.25, "math": 0.25, "eng": 0.25, "soc": 0.25, "sci": 0.5, "info": 0.5},
-            "pass_score_mean": 580,
-            "eng_rule": "kyodai_special"
-        },
-        "文学部": {
-            "center_max": 265, "secondary_max": 500,
-            "secondary_subjects": {"国語": 150, "数学": 100, "英語": 150, "地歴": 100},
-            "weights": {"jap": 0.25, "math": 0.25, "eng": 0.25, "soc": 0.25, "sci": 0.5, "info": 0.15},
-            "pass_score_mean": 485,
-            "eng_rule": "kyodai_special"
-        },
-        "教育学部 (文系)": {
-            "center_max": 265, "secondary_max": 650,
-            "secondary_subjects": {"国語": 150, "数学": 200, "英語": 200, "地歴": 100},
-            "weights": {"jap": 0.25, "math": 0.25, "eng": 0.25, "soc": 0.25, "sci": 0.5, "info": 0.15},
-            "pass_score_mean": 570,
-            "eng_rule": "kyodai_special"
-        },
-        "総合人間学部 (文系)": {
-            # 理科重視(100点)、社会圧縮(50点)
-            "center_max": 175, "secondary_max": 650,
-            "secondary_subjects": {"国語": 150, "数学": 200, "英語": 200, "地歴": 100},
-            "weights": {"jap": 0.0, "math": 0.0, "eng": 0.0, "soc": 0.25, "sci": 1.0, "info": 0.25},
-            "pass_score_mean": 520,
-            "eng_rule": "kyodai_special"
-        }
-    },
-    
-    # ---------------------------------------------------------
-    # 京都大学 (理系)
-    # ---------------------------------------------------------
-    "京都大学 (理系)": {
-        "工学部": {
-            # 英語1:1配点
-            "center_max": 225, "secondary_max": 800,
-            "secondary_subjects": {"数学": 250, "理科①": 125, "理科②": 125, "英語": 200, "国語": 100},
-            "weights": {"jap": 0.125, "math": 0.125, "eng": 0.25, "soc": 0.5, "sci": 0.125, "info": 0.5},
-            "pass_score_mean": 630, 
-            "eng_rule": "normal_sum"
-        },
-        "理学部": {
-            # 全科目0.25倍
-            "center_max": 250, "secondary_max": 975,
-            "secondary_subjects": {"数学": 300, "理科①": 150, "理科②": 150, "英語": 225, "国語": 150},
-            "weights": {"jap": 0.25, "math": 0.25, "eng": 0.25, "soc": 0.25, "sci": 0.25, "info": 0.25},
-            "pass_score_mean": 750,
-            "eng_rule": "kyodai_special"
-        },
-        "医学部 (医学科)": {
-            "center_max": 275, "secondary_max": 1000,
-            "secondary_subjects": {"数学": 250, "理科①": 150, "理科②": 150, "英語": 300, "国語": 150},
-            "weights": {"jap": 0.25, "math": 0.25, "eng": 0.25, "soc": 0.5, "sci": 0.25, "info": 0.25},
-            "pass_score_mean": 950,
-            "eng_rule": "kyodai_special"
-        },
-        "薬学部": {
-            "center_max": 275, "secondary_max": 700,
-            "secondary_subjects": {"数学": 200, "理科①": 100, "理科②": 100, "英語": 200, "国語": 100},
-            "weights": {"jap": 0.25, "math": 0.25, "eng": 0.25, "soc": 0.5, "sci": 0.25, "info": 0.25},
-            "pass_score_mean": 650,
-            "eng_rule": "kyodai_special"
-        },
-        "農学部": {
-            "center_max": 350, "secondary_max": 700,
-            "secondary_subjects": {"数学": 200, "理科①": 100, "理科②": 100, "英語": 200, "国語": 100},
-            "weights": {"jap": 0.35, "math": 0.25, "eng": 0.25, "soc": 1.0, "sci": 0.25, "info": 0.3},
-            "pass_score_mean": 660,
-            "eng_rule": "kyodai_special"
-        },
-        "経済学部 (理系)": {
-            # ★修正: 二次は数学300, 英語200, 国語150 (計650点)。社会なし。
-            "center_max": 300, "secondary_max": 650,
-            "secondary_subjects": {"数学": 300, "英語": 200, "国語": 150},
-            "weights": {"jap": 0.25, "math": 0.25, "eng": 0.25, "soc": 0.5, "sci": 0.25, "info": 0.5},
-            "pass_score_mean": 680, # 満点増に伴い修正
-            "eng_rule": "kyodai_special"
-        },
-        "総合人間学部 (理系)": {
-            "center_max": 125, "secondary_max": 700,
-            "secondary_subjects": {"数学": 200, "理科①": 100, "理科②": 100, "英語": 150, "国語": 150},
-            "weights": {"jap": 0.0, "math": 0.0, "eng": 0.0, "soc": 1.0, "sci": 0.0, "info": 0.25},
-            "pass_score_mean": 520,
-            "eng_rule": "kyodai_special"
-        }
-    },
-
-    # ---------------------------------------------------------
-    # 北海道大学 (文系)
-    # ---------------------------------------------------------
-    "北海道大学 (文系)": {
-        "総合入試 (文系)": {
-            "center_max": 315, "secondary_max": 450,
-            "secondary_subjects": {"国語": 150, "数学": 150, "英語": 150},
-            "weights": {"jap": 0.3, "math": 0.3, "eng": 0.3, "soc": 0.4, "sci": 0.4, "info": 0.15},
-            "pass_score_mean": 528,
-            "eng_rule": "normal_sum"
-        },
-        "文学部": {
-            "center_max": 315, "secondary_max": 450,
-            "secondary_subjects": {"国語": 150, "数学": 150, "英語": 150},
-            "weights": {"jap": 0.3, "math": 0.3, "eng": 0.3, "soc": 0.4, "sci": 0.4, "info": 0.15},
-            "pass_score_mean": 533,
-            "eng_rule": "normal_sum"
-        },
-        "法学部": {
-            "center_max": 315, "secondary_max": 450,
-            "secondary_subjects": {"国語": 150, "数学": 150, "英語": 150},
-            "weights": {"jap": 0.3, "math": 0.3, "eng": 0.3, "soc": 0.4, "sci": 0.4, "info": 0.15}, 
-            "pass_score_mean": 531,
-            "eng_rule": "normal_sum"
-        },
-        "経済学部": {
-            "center_max": 315, "secondary_max": 450,
-            "secondary_subjects": {"国語": 150, "数学": 150, "英語": 150},
-            "weights": {"jap": 0.3, "math": 0.3, "eng": 0.3, "soc": 0.4, "sci": 0.4, "info": 0.15},
-            "pass_score_mean": 531,
-            "eng_rule": "normal_sum"
-        },
-        "教育学部": {
-            "center_max": 315, "secondary_max": 450,
-            "secondary_subjects": {"国語": 150, "数学": 150, "英語": 150},
-            "weights": {"jap": 0.3, "math": 0.3, "eng": 0.3, "soc": 0.4, "sci": 0.4, "info": 0.15},
-            "pass_score_mean": 513,
-            "eng_rule": "normal_sum"
-        }
-    },
-    
-    # ---------------------------------------------------------
-    # 北海道大学 (理系) - 重点入試を追加
-    # ---------------------------------------------------------
-    "北海道大学 (理系)": {
-        "総合入試 (理系) - 標準": {
-            "center_max": 315, "secondary_max": 450,
-            "secondary_subjects": {"数学": 150, "理科①": 75, "理科②": 75, "英語": 150},
-            "weights": {"jap": 0.4, "math": 0.3, "eng": 0.3, "soc": 0.4, "sci": 0.3, "info": 0.15},
-            "pass_score_mean": 541,
-            "eng_rule": "normal_sum"
-        },
-        "総合入試 (理系) - 数学重点": {
-            "center_max": 315, "secondary_max": 525,
-            "secondary_subjects": {"数学": 225, "理科①": 75, "理科②": 75, "英語": 150},
-            "weights": {"jap": 0.4, "math": 0.3, "eng": 0.3, "soc": 0.4, "sci": 0.3, "info": 0.15},
-            "pass_score_mean": 585,
-            "eng_rule": "normal_sum"
-        },
-        "総合入試 (理系) - 物理重点": {
-            "center_max": 315, "secondary_max": 487.5,
-            "secondary_subjects": {"数学": 150, "理科①(重点)": 112.5, "理科②": 75, "英語": 150},
-            "weights": {"jap": 0.4, "math": 0.3, "eng": 0.3, "soc": 0.4, "sci": 0.3, "info": 0.15},
-            "pass_score_mean": 565,
-            "eng_rule": "normal_sum"
-        },
-        "総合入試 (理系) - 化学重点": {
-            "center_max": 315, "secondary_max": 487.5,
-            "secondary_subjects": {"数学": 150, "理科①(重点)": 112.5, "理科②": 75, "英語": 150},
-            "weights": {"jap": 0.4, "math": 0.3, "eng": 0.3, "soc": 0.4, "sci": 0.3, "info": 0.15},
-            "pass_score_mean": 565,
-            "eng_rule": "normal_sum"
-        },
-        "総合入試 (理系) - 生物重点": {
-            "center_max": 315, "secondary_max": 487.5,
-            "secondary_subjects": {"数学": 150, "理科①(重点)": 112.5, "理科②": 75, "英語": 150},
-            "weights": {"jap": 0.4, "math": 0.3, "eng": 0.3, "soc": 0.4, "sci": 0.3, "info": 0.15},
-            "pass_score_mean": 565,
-            "eng_rule": "normal_sum"
-        },
-        "医学部 (医学科)": {
-            "center_max": 315, "secondary_max": 525,
-            "secondary_subjects": {"数学": 150, "理科①": 75, "理科②": 75, "英語": 150, "面接": 75},
-            "weights": {"jap": 0.4, "math": 0.3, "eng": 0.3, "soc": 0.4, "sci": 0.3, "info": 0.15},
-            "pass_score_mean": 681,
-            "eng_rule": "normal_sum"
-        },
-        "歯学部": {
-            "center_max": 315, "secondary_max": 525,
-            "secondary_subjects": {"数学": 150, "理科①": 75, "理科②": 75, "英語": 150, "面接/小論": 75},
-            "weights": {"jap": 0.4, "math": 0.3, "eng": 0.3, "soc": 0.4, "sci": 0.3, "info": 0.15},
-            "pass_score_mean": 571,
-            "eng_rule": "normal_sum"
-        },
-        "獣医学部": {
-            "center_max": 315, "secondary_max": 450,
-            "secondary_subjects": {"数学": 150, "理科①": 75, "理科②": 75, "英語": 150},
-            "weights": {"jap": 0.4, "math": 0.3, "eng": 0.3, "soc": 0.4, "sci": 0.3, "info": 0.15},
-            "pass_score_mean": 621,
-            "eng_rule": "normal_sum"
-        },
-        "水産学部": {
-            "center_max": 315, "secondary_max": 450,
-            "secondary_subjects": {"数学": 150, "理科①": 75, "理科②": 75, "英語": 150},
-            "weights": {"jap": 0.4, "math": 0.3, "eng": 0.3, "soc": 0.4, "sci": 0.3, "info": 0.15},
-            "pass_score_mean": 501,
-            "eng_rule": "normal_sum"
-        }
-    },
-
-    # ---------------------------------------------------------
-    # 一橋大学
-    # ---------------------------------------------------------
-    "一橋大学": {
-        "商学部": {
-            "center_max": 300, "secondary_max": 700,
-            "secondary_subjects": {"英語": 235, "数学": 230, "国語": 110, "社会": 125},
-            "weights": {"jap": 0.25, "math": 0.25, "eng": 0.25, "soc": 0.25, "sci": 0.5, "info": 0.5},
-            "pass_score_mean": 600,
-            "eng_rule": "normal_sum"
-        },
-        "経済学部": {
-            "center_max": 210, "secondary_max": 790,
-            "secondary_subjects": {"英語": 260, "数学": 260, "国語": 110, "社会": 160},
-            "weights": {"jap": 0.175, "math": 0.175, "eng": 0.175, "soc": 0.175, "sci": 0.35, "info": 0.35},
-            "pass_score_mean": 580,
-            "eng_rule": "normal_sum"
-        },
-        "法学部": {
-            "center_max": 250, "secondary_max": 750,
-            "secondary_subjects": {"英語": 280, "数学": 180, "国語": 120, "社会": 170},
-            "weights": {"jap": 0.2, "math": 0.25, "eng": 0.2, "soc": 0.25, "sci": 0.4, "info": 0.3},
-            "pass_score_mean": 600,
-            "eng_rule": "normal_sum"
-        },
-        "社会学部": {
-            "center_max": 180, "secondary_max": 820,
-            "secondary_subjects": {"英語": 280, "数学": 130, "国語": 180, "社会": 230}, # ★修正: 英280, 社230
-            "weights": {"jap": 0.1, "math": 0.1, "eng": 0.1, "soc": 0.1, "sci": 0.9, "info": 0.1},
-            "pass_score_mean": 600,
-            "eng_rule": "normal_sum"
-        },
-        "SDS学部": {
-            "center_max": 250, "secondary_max": 750,
-            "secondary_subjects": {"英語": 230, "数学": 330, "国語": 100, "総合": 90},
-            "weights": {"jap": 0.2, "math": 0.2, "eng": 0.2, "soc": 0.2, "sci": 0.4, "info": 0.5},
-            "pass_score_mean": 630,
-            "eng_rule": "normal_sum"
-        }
-    }
-}
+table = load_table(year_selector())
+# 過去の合格者得点分布 (プロセスで 1 回だけ読み込み)
+pass_dist = get_distribution(table.year)
 
 # ==========================================
 # 2. UI & 入力フォーム
 # ==========================================
-st.set_page_config(page_title="合格判定シミュレーター", layout="centered")
-
+prof.section("form")
 st.title("大学入試 合格判定シミュレーター")
 st.caption("2026年度(令和8年度)新課程入試対応。入力履歴機能付き。")
 
@@ -276,12 +43,13 @@ st.caption("2026年度(令和8年度)新課程入試対応。入力履歴機能
 st.subheader("1. 志望校選択")
 c_uni, c_fac = st.columns(2)
 with c_uni:
-    selected_univ = st.selectbox("大学", list(UNIVERSITY_DATA.keys()))
+    selected_univ = st.selectbox("大学", list(table.univs))
 with c_fac:
-    faculty_list = list(UNIVERSITY_DATA[selected_univ].keys())
+    faculty_list = table.faculties(selected_univ)
     selected_faculty = st.selectbox("学部・方式", faculty_list)
 
-target_data = UNIVERSITY_DATA[selected_univ][selected_faculty]
+faculty_idx = table.index(selected_univ, selected_faculty)
+target_data = table.faculty(faculty_idx)
 
 # 文系・理系の自動判定
 is_science_univ = "理系" in selected_univ
@@ -302,73 +70,189 @@ st.divider()
 st.subheader("2. 共通テスト自己採点")
 st.caption("素点（新課程 1000点満点）を入力してください。")
 
-col1, col2 = st.columns(2)
-with col1:
-    st.markdown("##### 国数英")
-    val_jap = st.number_input("国語 (200)", 0, 200, 160)
-    val_m1 = st.number_input("数学IA (100)", 0, 100, 70)
-    val_m2 = st.number_input("数学IIBC (100)", 0, 100, 70)
-    st.markdown("---")
-    st.markdown("##### 英語 (R/L)")
-    val_eng_r = st.number_input("リーディング (100)", 0, 100, 85)
-    val_eng_l = st.number_input("リスニング (100)", 0, 100, 75)
-
-with col2:
-    if is_science_univ:
-        # --- 理系用フォーム ---
-        st.markdown("##### 地歴公民・理科 (理系)")
-        st.info("理系：地歴1科目、理科2科目")
-        
-        val_soc_s = st.number_input("地歴公民 (100)", 0, 100, 80, key="soc_s")
-        val_sci1 = st.number_input("理科 第1解答科目 (100)", 0, 100, 75, key="sci1")
-        val_sci2 = st.number_input("理科 第2解答科目 (100)", 0, 100, 75, key="sci2")
-        
-        val_soc_total = val_soc_s
-        val_sci_total = val_sci1 + val_sci2 
-        
-    else:
-        # --- 文系用フォーム ---
-        st.markdown("##### 地歴公民・理科 (文系)")
-        st.success("文系：地歴2科目、理科基礎(または専門1)")
-        
-        val_soc1 = st.number_input("地歴公民 ① (100)", 0, 100, 85, key="soc1")
-        val_soc2 = st.number_input("地歴公民 ② (100)", 0, 100, 80, key="soc2")
-        val_sci_base = st.number_input("理科 (基礎2 or 専門1) (100)", 0, 100, 80, key="sci_base")
-        
-        val_soc_total = val_soc1 + val_soc2 
-        val_sci_total = val_sci_base 
-    
-    st.markdown("---")
-    st.markdown("##### 情報")
-    val_info = st.number_input("情報I (100)", 0, 100, 80)
+x = center_score_form(is_science_univ)
 
 
 # ==========================================
 # 3. 計算ロジック
 # ==========================================
+prof.section("calculation")
 w = target_data["weights"]
 
-# 英語の計算
-if target_data["eng_rule"] == "kyodai_special":
-    eng_base_score = (val_eng_r * 1.5) + (val_eng_l * 0.5)
-else:
-    eng_base_score = val_eng_r + val_eng_l
+# 英語の R/L 比は重み行列側に畳み込み済み (kyodai/engine.py)
+# 同じ学部・同じ点数の結果はセッション横断のキャッシュから返る
+verdict = faculty_verdict(table, faculty_idx, x, target_score)
+
+score_info = verdict.score_info
+total_center_score = verdict.total_center
+
+# 各セクションは st.fragment で、入力を変えてもそのセクションだけが再実行される。
+# 引数は最後の全体実行時の値がそのまま使われる (共テ入力を変えると全体が再実行される)。
+@st.fragment
+@timed("allocation")
+def allocation_section(target_data, required_secondary, total_center_score,
+                       selected_univ, selected_faculty, history_store, history_owner,
+                       pass_dist, faculty_idx):
+    with st.expander("二次試験の配分シミュレーション", expanded=True):
+        st.write("各科目の目標点数を入力してください。")
+        
+        sim_total = 0
+        cols = st.columns(len(target_data["secondary_subjects"]))
+        
+        for idx, (subj, max_pt) in enumerate(target_data["secondary_subjects"].items()):
+            with cols[idx]:
+                # 浮動小数点が混ざってもエラーにならないようfloat型で統一
+                val = st.number_input(
+                    f"{subj} (/{max_pt})", 
+                    min_value=0.0,              # float
+                    max_value=float(max_pt),    # float
+                    value=float(int(max_pt * 0.6)), # float
+                    step=1.0,                   # float
+                    format="%.1f",
+                    key=f"sim_{subj}"
+                )
+                sim_total += val
+        
+        gap = sim_total - required_secondary
+        st.markdown(f"**シミュレーション合計: {sim_total}点**")
+
+        # 過去の合格者の中での位置 (データのある学部のみ)
+        if pass_dist.has_data(faculty_idx):
+            total = total_center_score + sim_total
+            pct = pass_dist.percentile([total], [faculty_idx])[0]
+            band = pass_dist.rank_band([total], [faculty_idx])[0]
+            note = " (最低・平均・最高点からの推定)" if pass_dist.estimated[faculty_idx] else ""
+            st.caption(f"総合 {total:.1f} 点は過去の合格者の {pct * 100:.0f}% 以上: {band}{note}")
+        
+        if gap >= 0:
+            st.success(f"目標クリア (余裕: +{gap:.1f}点)")
+            if st.button("この結果を履歴に保存", key="save_success"):
+                history_store.add(HistoryRecord.now(
+                    owner=history_owner,
+                    univ=selected_univ,
+                    faculty=selected_faculty,
+                    center_score=total_center_score,
+                    secondary_total=sim_total,
+                    gap=gap,
+                ))
+                st.session_state["history_saved"] = True
+                st.rerun(scope="app")
+        else:
+            st.warning(f"あと {abs(gap):.1f}点 足りません")
+            if st.button("この結果を履歴に保存", key="save_fail"):
+                history_store.add(HistoryRecord.now(
+                    owner=history_owner,
+                    univ=selected_univ,
+                    faculty=selected_faculty,
+                    center_score=total_center_score,
+                    secondary_total=sim_total,
+                    gap=gap,
+                ))
+                st.session_state["history_saved"] = True
+                st.rerun(scope="app")
+
+        # 保存後は履歴エリアも更新するため全体を再実行し、その後でメッセージを出す
+        if st.session_state.pop("history_saved", False):
+            st.success("履歴に保存しました！")
+
+
+@st.fragment
+@timed("optimizer")
+def optimizer_section(target_data, required_secondary):
+    # 閉じている間は中身を実行しない (表・グラフ用の pandas / altair の読み込みも開いたときまで遅らせる)
+    expander = st.expander("二次試験の最適配分 (自動計算)", key="optimizer_open", on_change="rerun")
+    if not expander.open:
+        return
+    import pandas as pd
+
+    with expander:
+        st.write("各科目の現在の実力と伸ばしにくさから、必要点に届く最も負担の少ない配分を計算します。")
+        subjects = target_data["secondary_subjects"]
+        opt_ability, opt_difficulty = [], []
+        cols = st.columns(len(subjects))
+        for idx, (subj, max_pt) in enumerate(subjects.items()):
+            with cols[idx]:
+                opt_ability.append(st.number_input(
+                    f"{subj} 現在 (/{max_pt})",
+                    min_value=0.0, max_value=float(max_pt),
+                    value=float(int(max_pt * 0.5)), step=1.0, format="%.1f",
+                    key=f"opt_ability_{subj}"
+                ))
+                opt_difficulty.append(st.select_slider(
+                    f"{subj} 伸ばしにくさ",
+                    options=[0.5, 1.0, 1.5, 2.0, 3.0], value=1.0,
+                    key=f"opt_difficulty_{subj}"
+                ))
+
+        max_points = tuple(float(v) for v in subjects.values())
+        opt_scores, opt_cost, _ = best_allocation(
+            float(required_secondary), tuple(opt_ability), max_points, tuple(opt_difficulty)
+        )
+        st.dataframe(
+            pd.DataFrame({
+                "科目": list(subjects.keys()),
+                "現在": opt_ability,
+                "目標 (最適)": [round(v, 1) for v in opt_scores],
+                "伸ばす点数": [round(v - a, 1) for v, a in zip(opt_scores, opt_ability)],
+            }),
+            hide_index=True, width="stretch",
+        )
+        st.caption(f"合計 {sum(opt_scores):.1f}点 / 追加の学習負担 {opt_cost:.1f}")
+
+        totals, costs, _ = frontier(tuple(opt_ability), max_points, tuple(opt_difficulty))
+        st.markdown("**合計点と学習負担のトレードオフ (パレート曲線)**")
+        st.line_chart(pd.DataFrame({"合計点": totals, "学習負担": costs}), x="合計点", y="学習負担")
 
-# 科目別スコア計算
-score_jap = val_jap * w["jap"]
-score_math = (val_m1 + val_m2) * w["math"]
-score_eng = eng_base_score * w["eng"]
-score_info = val_info * w["info"]
 
-# 理社はここで係数をかけるだけでOK
-score_soc = val_soc_total * w["soc"]
-score_sci = val_sci_total * w["sci"]
+# 合格確率シミュレーション (モンテカルロ)
+@st.fragment
+@timed("monte_carlo")
+def monte_carlo_section(target_data, total_center_score):
+    if st.toggle("合格確率モード (モンテカルロ)", key="mc_enabled"):
+        import pandas as pd
+
+        with st.expander("二次試験の得点分布と合格確率", expanded=True):
+            st.write("各科目の予想平均点とばらつき (±) を入力してください。満点でクリップされます。")
+            subjects = target_data["secondary_subjects"]
+            mc_means, mc_spreads = [], []
+            cols = st.columns(len(subjects))
+            for idx, (subj, max_pt) in enumerate(subjects.items()):
+                with cols[idx]:
+                    mc_means.append(st.number_input(
+                        f"{subj} 平均 (/{max_pt})",
+                        min_value=0.0, max_value=float(max_pt),
+                        value=float(int(max_pt * 0.6)), step=1.0, format="%.1f",
+                        key=f"mc_mean_{subj}"
+                    ))
+                    mc_spreads.append(st.number_input(
+                        f"{subj} ±",
+                        min_value=0.0, max_value=float(max_pt),
+                        value=float(int(max_pt * 0.1)), step=1.0, format="%.1f",
+                        key=f"mc_sd_{subj}"
+                    ))
+            pass_spread = st.number_input(
+                "合格最低点のばらつき (±)", min_value=0.0, value=15.0, step=1.0,
+                help=f"合格ラインは {target_data['pass_score_mean']} 点を中心に年度ごとに揺れるものとして扱います。"
+            )
+
+            mc = simulate_pass(
+                center_score=total_center_score,
+                subject_max=list(subjects.values()),
+                means=mc_means, spreads=mc_spreads,
+                pass_mean=target_data["pass_score_mean"], pass_spread=pass_spread,
+            )
+            m1, m2 = st.columns(2)
+            m1.metric("合格確率", f"{mc.p_pass * 100:.1f}%")
+            m2.metric("総合点の期待値", f"{mc.mean_total:.1f}")
+            centers = (mc.hist_edges[:-1] + mc.hist_edges[1:]) / 2
+            st.bar_chart(pd.DataFrame({"総合点": centers.round(0), "割合": mc.hist_counts / mc.draws}), x="総合点", y="割合")
+            st.caption(f"{mc.draws:,} 回の試行 (乱数シード固定)")
 
-total_center_score = score_jap + score_math + score_eng + score_soc + score_sci + score_info
 
 # ==========================================
 # 4. 結果表示
 # ==========================================
+prof.section("results")
 st.divider()
 st.subheader("判定結果")
 
@@ -381,9 +265,22 @@ with c2:
     else:
         st.metric("情報の換算点", f"{score_info:.1f}")
 with c3:
-    required_secondary = target_score - total_center_score
+    required_secondary = verdict.required_secondary
     st.metric("二次試験必要点", f"{max(0, required_secondary):.1f}")
 
+# 過去の合格者得点 (pass_history がある学部のみ)
+if pass_dist.history[faculty_idx]:
+    import pandas as pd
+
+    with st.expander("過去の合格者得点"):
+        st.dataframe(
+            pd.DataFrame([
+                {"年度": y["year"], "最低点": y.get("min"), "平均点": y.get("mean"), "最高点": y.get("max")}
+                for y in pass_dist.history[faculty_idx]
+            ]),
+            hide_index=True,
+        )
+
 # 二次試験シミュレーション
 if required_secondary <= 0:
     st.success(f"共通テストのみで目標点を超えています (+{abs(required_secondary):.1f})")
@@ -395,64 +292,53 @@ else:
     prog = min(required_secondary / target_data["secondary_max"], 1.0)
     st.progress(prog)
 
-    with st.expander("二次試験の配分シミュレーション", expanded=True):
-        st.write("各科目の目標点数を入力してください。")
-        
-        sim_total = 0
-        cols = st.columns(len(target_data["secondary_subjects"]))
-        
-        for idx, (subj, max_pt) in enumerate(target_data["secondary_subjects"].items()):
-            with cols[idx]:
-                # 浮動小数点が混ざってもエラーにならないようfloat型で統一
-                val = st.number_input(
-                    f"{subj} (/{max_pt})", 
-                    min_value=0.0,              # float
-                    max_value=float(max_pt),    # float
-                    value=float(int(max_pt * 0.6)), # float
-                    step=1.0,                   # float
-                    format="%.1f",
-                    key=f"sim_{subj}"
-                )
-                sim_total += val
-        
-        gap = sim_total - required_secondary
-        st.markdown(f"**シミュレーション合計: {sim_total}点**")
-        
-        if gap >= 0:
-            st.success(f"目標クリア (余裕: +{gap:.1f}点)")
-            if st.button("この結果を履歴に保存", key="save_success"):
-                now_str = datetime.now().strftime("%Y-%m-%d %H:%M")
-                new_record = {
-                    "日時": now_str,
-                    "大学": selected_univ,
-                    "学部": selected_faculty,
-                    "共テ換算": f"{total_center_score:.1f}",
-                    "二次目標": f"{sim_total}点",
-                    "合否": "合格圏"
-                }
-                st.session_state['history'].append(new_record)
-                st.success("履歴に保存しました！")
-        else:
-            st.warning(f"あと {abs(gap):.1f}点 足りません")
-            if st.button("この結果を履歴に保存", key="save_fail"):
-                now_str = datetime.now().strftime("%Y-%m-%d %H:%M")
-                new_record = {
-                    "日時": now_str,
-                    "大学": selected_univ,
-                    "学部": selected_faculty,
-                    "共テ換算": f"{total_center_score:.1f}",
-                    "二次目標": f"{sim_total}点",
-                    "合否": f"不足 {abs(gap):.1f}"
-                }
-                st.session_state['history'].append(new_record)
-                st.success("履歴に保存しました！")
+    allocation_section(
+        target_data, required_secondary, total_center_score,
+        selected_univ, selected_faculty, history_store, history_owner,
+        pass_dist, faculty_idx,
+    )
+    optimizer_section(target_data, required_secondary)
+
+monte_carlo_section(target_data, total_center_score)
 
 # ==========================================
 # 5. 履歴表示エリア
 # ==========================================
-if st.session_state['history']:
-    st.divider()
-    st.subheader("📝 計算履歴")
-    df_history = pd.DataFrame(st.session_state['history'])
-    df_history = df_history.iloc[::-1]
-    st.dataframe(df_history, use_container_width=True)
+@st.fragment
+@timed("history_page")
+def history_section(history_store, history_owner):
+    history_filter_univ = st.session_state.get("history_univ", "すべて")
+    history_count = history_store.count(
+        history_owner, univ=None if history_filter_univ == "すべて" else history_filter_univ
+    )
+    if history_count or history_filter_univ != "すべて":
+        # pandas は表を出すときだけ読み込む (履歴のない初回表示では読み込まない)
+        import pandas as pd
+
+        st.divider()
+        st.subheader("📝 計算履歴")
+        h_univ, h_page = st.columns(2)
+        with h_univ:
+            st.selectbox(
+                "大学で絞り込み", ["すべて"] + history_store.univs(history_owner), key="history_univ",
+                on_change=lambda: st.session_state.update(history_page=1),
+            )
+        with h_page:
+            page_count = max(1, -(-history_count // HISTORY_PAGE_SIZE))
+            st.session_state.setdefault("history_page", 1)
+            page_no = st.number_input(f"ページ (全 {page_count})", 1, page_count, key="history_page")
+        records = history_store.page(
+            history_owner, page=page_no - 1,
+            univ=None if history_filter_univ == "すべて" else history_filter_univ,
+        )
+        df_history = pd.DataFrame([display_row(r) for r in records])
+        st.dataframe(df_history, width="stretch")
+        st.caption(f"{history_count} 件中 {len(records)} 件を表示 (新しい順)")
+
+
+prof.section("history")
+history_section(history_store, history_owner)
+history_resume_form()
+
+prof.end()
+render_sidebar(prof)
@@ -0,0 +1,92 @@
+# ==========================================
+# 過去の合格者得点分布 (kyodai.passdist) の検算
+# ==========================================
+# 使い方:
+#   python -m benchmarks.check_passdist
+#
+# 同梱の入試データにはまだ pass_history がないため、架空の点数のフィクスチャ
+# (benchmarks/fixtures/pass_history.json) を読み込み、手計算した値と照合する。
+#
+#   得点帯あり          2024: [500,550) 10 人・[550,600) 30 人 / 2025: [550,600) 20 人・[600,650) 40 人
+#                       → 累積割合 500: 0, 550: 0.1, 600: 0.6, 650: 1.0 (帯の中は直線補間)
+#   最低・平均・最高のみ (400, 0) (450, 0.5) (520, 1) の折れ線
+#   履歴なし            パーセンタイルは NaN、順位帯は None
+#
+# 1 件でも食い違えば終了コード 1 を返す。
+import math
+import sys
+from pathlib import Path
+
+from kyodai.data import _validate_pass_history, read_dataset
+from kyodai.passdist import ABOVE_MAX, BELOW_MIN, RANK_LABELS, build_distribution
+
+FIXTURE = Path(__file__).resolve().parent / "fixtures" / "pass_history.json"
+UNIV = "検証用大学 (文系)"
+
+# (学部, 総合点, 期待するパーセンタイル, 期待する順位帯)
+CASES = [
+    # 得点帯: 補間と帯の境界
+    ("得点帯あり", 525, 0.05, RANK_LABELS[0]),
+    ("得点帯あり", 550, 0.10, RANK_LABELS[0]),
+    ("得点帯あり", 564, 0.24, RANK_LABELS[0]),
+    ("得点帯あり", 566, 0.26, RANK_LABELS[1]),     # 25% の境界をまたぐ
+    ("得点帯あり", 575, 0.35, RANK_LABELS[1]),
+    ("得点帯あり", 600, 0.60, RANK_LABELS[2]),     # 2 年度の帯がつながる点
+    ("得点帯あり", 630, 0.84, RANK_LABELS[3]),
+    ("得点帯あり", 640, 0.92, RANK_LABELS[4]),
+    # 範囲外は 0 / 1 に丸め、順位帯は最低点未満 / 最高点以上
+    ("得点帯あり", 480, 0.0, BELOW_MIN),
+    ("得点帯あり", 650, 1.0, ABOVE_MAX),
+    ("得点帯あり", 700, 1.0, ABOVE_MAX),
+    # min / mean / max の折れ線
+    ("最低・平均・最高のみ", 425, 0.25, RANK_LABELS[1]),
+    ("最低・平均・最高のみ", 450, 0.50, RANK_LABELS[2]),
+    ("最低・平均・最高のみ", 485, 0.75, RANK_LABELS[3]),
+    ("最低・平均・最高のみ", 399, 0.0, BELOW_MIN),
+    # データなし
+    ("履歴なし", 500, math.nan, None),
+]
+
+
+def _same(a, b):
+    return (math.isnan(a) and math.isnan(b)) or abs(a - b) < 1e-9
+
+
+def main():
+    universities = read_dataset(FIXTURE)["universities"]
+    keys = [(UNIV, faculty) for faculty in universities[UNIV]]
+    dist = build_distribution(universities, keys)
+    index = {faculty: i for i, (_, faculty) in enumerate(keys)}
+
+    failures = []
+    # 全ケースを 1 回の呼び出しでまとめて引く (画面のランキングと同じ使い方)
+    idx = [index[faculty] for faculty, *_ in CASES]
+    totals = [total for _, total, *_ in CASES]
+    pcts = dist.percentile(totals, idx)
+    bands = dist.rank_band(totals, idx)
+    for (faculty, total, want_pct, want_band), pct, band in zip(CASES, pcts, bands):
+        ok = _same(float(pct), want_pct) and band == want_band
+        print(f"{'ok ' if ok else 'NG '} {faculty:<14}{total:>6}  {pct:>6.3f} (期待 {want_pct:.3f})  {band} (期待 {want_band})")
+        if not ok:
+            failures.append((faculty, total))
+
+    expected_flags = {"得点帯あり": (True, False), "最低・平均・最高のみ": (True, True), "履歴なし": (False, False)}
+    for faculty, (has_data, estimated) in expected_flags.items():
+        i = index[faculty]
+        got = (dist.has_data(i), bool(dist.estimated[i]))
+        if got != (has_data, estimated):
+            print(f"NG  {faculty}: has_data / estimated = {got} (期待 {(has_data, estimated)})")
+            failures.append((faculty, "flags"))
+
+    # 人数の合計が 0 の得点帯は読み込み時に弾く
+    errors = _validate_pass_history("検証", [{"year": 2025, "bands": [[500, 550, 0], [550, 600, 0]]}])
+    if not any("合計が 0" in e for e in errors):
+        print(f"NG  人数 0 の得点帯が検証で弾かれません: {errors}")
+        failures.append(("zero bands", None))
+
+    print("すべて一致" if not failures else f"{len(failures)} 件が不一致")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
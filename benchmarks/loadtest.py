@@ -0,0 +1,264 @@
+# ==========================================
+# 同時セッションの負荷試験 (AppTest + プロセスプール)
+# ==========================================
+# 使い方:
+#   python -m benchmarks.loadtest                          # 同時セッション 1, 10, 50 (1 プロセス)
+#   python -m benchmarks.loadtest --levels 1,50,100,300 -o load.json
+#
+# 各セッションは「大学・学部を選ぶ → 共テを入力 → 二次目標を調整 → 履歴に保存」を繰り返す。
+# AppTest は 1 プロセス内で同時に 1 スクリプトしか実行できないため、各プロセスは担当セッションを
+# すべて生かしたまま 1 操作ずつ順番に進める。
+#
+# 構成: 本番は Streamlit 1 プロセスが全セッションをスレッドで処理し、GIL も共有する。既定の
+# --workers 1 はこれに近い (1 プロセスに c セッション)。--workers N は c セッションを N 個の
+# 独立したプロセスに振り分けるので、サーバー N 台分の値になる (処理能力は 1 台の約 N 倍に見える)。
+# 出力と JSON には構成 (topology) を必ず併記する。
+#
+# 報告する値:
+#   throughput      全操作数 / 経過時間 (操作/秒)。経過時間は捨てセッション後の計測区間だけ
+#   p50 / p99       1 操作 (= 1 回の再実行) のレイテンシ。AppTest は fragment 内の入力でも
+#                   スクリプト全体を再実行するので、二次配分の調整なども全体の再実行として測られる
+#                   (fragment だけの時間は benchmarks.run の page.fragment.allocation)
+#   rss_per_session プロセス RSS の増分 / そのプロセスのセッション数。RSS は揺れが大きいので、
+#                   後半の各周回後の値の中央値と範囲 (最小〜最大) を出し、0 未満は 0 にする
+#   state_bytes     セッションあたりの st.session_state の大きさ (pickle 後)
+#   history_rows    セッションあたりに保存された履歴件数 (SQLite)
+import argparse
+import json
+import os
+import pickle
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+APP_PATH = ROOT / "app.py"
+
+# _script の 1 周 (大学・学部の選択 2 + 共テ 2 + 二次 2 + 保存 1) の操作数
+CYCLE_STEPS = 7
+
+UNIVS = ["京都大学 (文系)", "京都大学 (理系)", "北海道大学 (文系)", "北海道大学 (理系)", "一橋大学"]
+COMMON_TEST_LABELS = ["国語 (200)", "数学IA (100)", "数学IIBC (100)", "リーディング (100)", "リスニング (100)"]
+
+
+def _rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        import resource
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _state_bytes(at):
+    total = 0
+    for key, value in at.session_state.to_dict().items():
+        try:
+            total += len(pickle.dumps((key, value)))
+        except Exception:
+            total += len(repr(value))
+    return total
+
+
+class SimulatedSession:
+    def __init__(self, owner, seed):
+        from streamlit.testing.v1 import AppTest
+
+        self.owner = owner
+        self.rng = random.Random(seed)
+        self.at = AppTest.from_file(str(APP_PATH), default_timeout=120)
+        self.at.session_state["history_owner"] = owner
+        self.steps = self._script()
+
+    def _script(self):
+        # 1 周分の操作。各要素は AppTest を 1 回 run() する関数
+        rng = self.rng
+        yield lambda: self.at.run()
+        while True:
+            yield lambda: self.at.selectbox[0].select(rng.choice(UNIVS)).run()
+            yield lambda: self.at.selectbox[1].set_value(rng.choice(self.at.selectbox[1].options)).run()
+            for _ in range(2):
+                label = rng.choice(COMMON_TEST_LABELS)
+                yield lambda label=label: self._set_common_test(label)
+            for _ in range(2):
+                yield self._tweak_secondary
+            yield self._save
+
+    def _set_common_test(self, label):
+        widget = next(n for n in self.at.number_input if n.label == label)
+        top = 200 if label.startswith("国語") else 100
+        widget.set_value(self.rng.randint(top // 2, top)).run()
+
+    def _tweak_secondary(self):
+        sims = [n for n in self.at.number_input if (n.key or "").startswith("sim_")]
+        if not sims:  # 必要点が 0 以下 / 満点超えの学部では配分欄が出ない
+            return self.at.run()
+        widget = self.rng.choice(sims)
+        # 満点はラベル "英語 (/200)" から読む
+        top = float(widget.label.rsplit("/", 1)[1].rstrip(")"))
+        widget.set_value(float(self.rng.randint(0, int(top)))).run()
+
+    def _save(self):
+        buttons = [b for b in self.at.button if b.key in ("save_success", "save_fail")]
+        if not buttons:
+            return self.at.run()
+        buttons[0].click().run()
+
+    def warm_up(self):
+        # 初回表示・最適配分・合格確率モード・1 周分の操作 (保存を含む) をひと通り実行し、
+        # pandas / altair / pyarrow の遅延 import や各キャッシュの初期化をここで済ませる。
+        # 初期表示の学部は必要点が 0〜二次満点の範囲なので、最適配分の欄も表示される
+        self.step()
+        self.at.session_state["optimizer_open"] = True
+        self.at.run()
+        self.at.toggle(key="mc_enabled").set_value(True).run()
+        for _ in range(CYCLE_STEPS):
+            self.step()
+        if self.at.exception:
+            raise RuntimeError(f"{self.owner}: {self.at.exception[0].message}")
+
+    def step(self):
+        start = time.perf_counter()
+        next(self.steps)()
+        elapsed = (time.perf_counter() - start) * 1000
+        if self.at.exception:
+            raise RuntimeError(f"{self.owner}: {self.at.exception[0].message}")
+        return elapsed
+
+
+def _run_worker(args):
+    owners, steps_per_session, data_dir, seed = args
+    os.environ["KYODAI_DATA_DIR"] = data_dir
+    os.environ["KYODAI_CACHE_DIR"] = data_dir
+    sys.path.insert(0, str(ROOT))
+
+    # import やキャッシュの初期化分を除くため、捨てセッションで全経路を 1 周してから測る
+    SimulatedSession(f"warmup-{seed}", seed).warm_up()
+    rss_before = _rss_bytes()
+    sessions = [SimulatedSession(owner, seed + i) for i, owner in enumerate(owners)]
+    latencies = []
+    rss_growth = []
+    # 全セッションを生かしたまま 1 操作ずつ順番に進め、1 周ごとに RSS の増分を記録する
+    start = time.perf_counter()
+    for _ in range(steps_per_session):
+        for s in sessions:
+            latencies.append(s.step())
+        rss_growth.append(_rss_bytes() - rss_before)
+    return {
+        "elapsed_s": time.perf_counter() - start,
+        "latencies_ms": latencies,
+        "rss_growth_bytes": rss_growth[len(rss_growth) // 2:],
+        "sessions": len(sessions),
+        "state_bytes": [_state_bytes(s.at) for s in sessions],
+    }
+
+
+def _history_rows(data_dir, owners):
+    from kyodai.history import HistoryStore
+
+    store = HistoryStore(Path(data_dir) / "history.sqlite3")
+    try:
+        return [store.count(owner) for owner in owners]
+    finally:
+        store.close()
+
+
+def _topology(procs):
+    if procs == 1:
+        return "1 プロセス (Streamlit サーバー 1 台相当、セッションは 1 操作ずつ順番に処理)"
+    return f"{procs} プロセス (独立したサーバー {procs} 台相当で、1 台の処理能力ではない)"
+
+
+def run_level(concurrency, workers, steps_per_session, data_dir, seed=0):
+    procs = max(1, min(concurrency, workers))
+    owners = [f"load-{concurrency}-{i}" for i in range(concurrency)]
+    chunks = [owners[i::procs] for i in range(procs)]
+
+    with ProcessPoolExecutor(max_workers=procs) as pool:
+        results = list(pool.map(
+            _run_worker,
+            [(chunk, steps_per_session, data_dir, seed + 1000 * i) for i, chunk in enumerate(chunks)],
+        ))
+    # プロセスの起動と捨てセッション分は含めず、計測区間が最も長かったプロセスの時間を使う
+    wall = max(r["elapsed_s"] for r in results)
+
+    latencies = np.concatenate([r["latencies_ms"] for r in results])
+    rss_per_session = np.clip(
+        np.concatenate([np.array(r["rss_growth_bytes"]) / r["sessions"] for r in results]), 0, None
+    ) / 2**20
+    state_bytes = [b for r in results for b in r["state_bytes"]]
+    history_rows = _history_rows(data_dir, owners)
+    return {
+        "concurrency": concurrency,
+        "processes": procs,
+        "topology": _topology(procs),
+        "interactions": int(len(latencies)),
+        "wall_s": wall,
+        "throughput_per_s": len(latencies) / wall,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "rss_per_session_mb": float(np.median(rss_per_session)),
+        "rss_per_session_mb_range": [float(rss_per_session.min()), float(rss_per_session.max())],
+        "state_bytes_per_session": float(np.mean(state_bytes)),
+        "history_rows_per_session": float(np.mean(history_rows)),
+    }
+
+
+def _mb_with_range(r):
+    lo, hi = r["rss_per_session_mb_range"]
+    return f"{r['rss_per_session_mb']:.2f} ({lo:.2f}-{hi:.2f})"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="同時セッション数を増やしながらアプリの処理能力を測る")
+    parser.add_argument("--levels", default="1,10,50", help="同時セッション数 (カンマ区切り)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="最大プロセス数 (2 以上はサーバー複数台分の値になる)")
+    parser.add_argument("--steps", type=int, default=20, help="セッションあたりの操作数")
+    parser.add_argument("-o", "--output", help="結果 JSON の保存先")
+    args = parser.parse_args(argv)
+
+    levels = [int(v) for v in args.levels.split(",") if v.strip()]
+    data_dir = tempfile.mkdtemp(prefix="kyodai-load-")
+    os.environ["KYODAI_DATA_DIR"] = data_dir
+    os.environ["KYODAI_CACHE_DIR"] = data_dir
+    sys.path.insert(0, str(ROOT))
+
+    # スナップショットは先に作っておき、各ワーカーが同時に作り直さないようにする
+    from kyodai import snapshot
+
+    snapshot.load()
+
+    print(f"構成 (--workers {args.workers}): {_topology(args.workers)}")
+    print(f"{'sessions':>8}{'procs':>7}{'ops/s':>10}{'p50 ms':>10}{'p99 ms':>10}"
+          f"{'MB/sess (range)':>22}{'state B':>10}{'history':>9}")
+    rows = []
+    for level in levels:
+        r = run_level(level, args.workers, args.steps, data_dir)
+        rows.append(r)
+        print(f"{r['concurrency']:>8}{r['processes']:>7}{r['throughput_per_s']:>10.1f}{r['p50_ms']:>10.1f}"
+              f"{r['p99_ms']:>10.1f}{_mb_with_range(r):>22}{r['state_bytes_per_session']:>10.0f}"
+              f"{r['history_rows_per_session']:>9.1f}")
+
+    if args.output:
+        report = {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "cpu_count": os.cpu_count(),
+            "workers": args.workers,
+            "steps_per_session": args.steps,
+            "levels": rows,
+        }
+        Path(args.output).write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        print(f"-> {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
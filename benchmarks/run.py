@@ -0,0 +1,414 @@
+# ==========================================
+# ベンチマーク (換算スループット / ページ再実行レイテンシ)
+# ==========================================
+# 使い方:
+#   python -m benchmarks.run                      # 全ベンチを実行し benchmarks/results/<commit>.json に保存
+#   python -m benchmarks.run --only scoring       # 換算のみ
+#   python -m benchmarks.run --compare benchmarks/results/<旧commit>.json
+#   python -m benchmarks.run --trend              # 保存済みの結果から起動時間・メモリの推移を表示
+#
+# 結果は中央値 (median_ms / メモリは MB) で比較する。--threshold を超えて悪化した項目は
+# REGRESSION として表示し、終了コード 1 を返す。起動時間とセッションあたりメモリは
+# TARGETS の目標値も確認し、超えた場合は TARGET MISSED として終了コード 1 を返す。
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+APP_PATH = ROOT / "app.py"
+
+# 起動時間・メモリの目標値 (超えたら TARGET MISSED)
+TARGETS = {
+    "startup.cold_first_run": {"median_ms": 1500.0},
+    "memory.per_session": {"median_mb": 2.0},
+}
+# RSS の測定誤差。これより小さいメモリの増減は REGRESSION にしない
+MEMORY_NOISE_MB = 0.5
+# 初回表示では読み込まないはずの重いモジュール
+LAZY_MODULES = ("pandas", "altair", "pyarrow")
+
+
+def _timeit(fn, repeat, warmup=1):
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "median_ms": statistics.median(samples),
+        "min_ms": samples[0],
+        "p95_ms": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        "repeat": repeat,
+    }
+
+
+# ==========================================
+# 1. 換算スループット
+# ==========================================
+def _scalar_center_score(row, fac):
+    # 以前の app.py の計算ロジック (1 人 × 1 学部ずつの Python スカラー計算)
+    jap, m1, m2, eng_r, eng_l, soc, sci, info = row
+    w = fac["weights"]
+    if fac["eng_rule"] == "kyodai_special":
+        eng_base_score = (eng_r * 1.5) + (eng_l * 0.5)
+    else:
+        eng_base_score = eng_r + eng_l
+    return (jap * w["jap"] + (m1 + m2) * w["math"] + eng_base_score * w["eng"]
+            + soc * w["soc"] + sci * w["sci"] + info * w["info"])
+
+
+def random_cohort(n, seed=0):
+    rng = np.random.default_rng(seed)
+    raw = rng.integers(0, 101, size=(n, 8)).astype(np.float64)
+    raw[:, 0] *= 2  # 国語 200
+    raw[:, 5] *= 2  # 地歴公民 (文系 2 科目)
+    return raw
+
+
+def bench_scoring(quick=False):
+    from kyodai.engine import get_table
+
+    table = get_table()
+    faculties = [table.faculty(i) for i in range(len(table))]
+    results = {}
+
+    n_scalar = 2_000 if quick else 10_000
+    rows = random_cohort(n_scalar).tolist()
+
+    def scalar():
+        for row in rows:
+            for fac in faculties:
+                _scalar_center_score(row, fac)
+
+    r = _timeit(scalar, repeat=3 if quick else 5)
+    r["students"] = n_scalar
+    r["faculties"] = len(faculties)
+    r["scores_per_sec"] = n_scalar * len(faculties) / (r["median_ms"] / 1000)
+    results["scoring.scalar"] = r
+
+    for n in ((10_000,) if quick else (10_000, 100_000)):
+        raw = random_cohort(n)
+        r = _timeit(lambda: table.score(raw), repeat=5 if quick else 20)
+        r["students"] = n
+        r["faculties"] = len(table)
+        r["scores_per_sec"] = n * len(table) / (r["median_ms"] / 1000)
+        results[f"scoring.batch_{n // 1000}k"] = r
+
+    # スカラー版とバッチ版の結果が一致することも確認しておく
+    check = random_cohort(200, seed=1)
+    batch = table.score(check)
+    scalar_scores = np.array([[_scalar_center_score(row, fac) for fac in faculties] for row in check.tolist()])
+    if not np.allclose(batch, scalar_scores):
+        raise AssertionError("バッチ換算とスカラー換算の結果が一致しません")
+    return results
+
+
+# ==========================================
+# 2. ページ再実行レイテンシ (AppTest)
+# ==========================================
+def _seed_history(owner, count):
+    from kyodai.engine import get_table
+    from kyodai.history import HistoryRecord, HistoryStore
+
+    table = get_table()
+    store = HistoryStore()
+    records = []
+    for i in range(count):
+        univ, faculty = table.keys[i % len(table)]
+        records.append(HistoryRecord.now(owner, univ, faculty, 200 + i % 80, 350 + i % 120, (i % 60) - 30))
+    store.add_many(records)
+    store.close()
+
+
+def _fragment_span(fn, name, repeat, warmup=1):
+    # @timed(name) を付けた fragment 関数の本体だけの所要時間を kyodai.profiling の計測区間から集計する
+    from kyodai import profiling
+
+    previous = os.environ.get("KYODAI_PROFILE")
+    os.environ["KYODAI_PROFILE"] = "1"
+    try:
+        for _ in range(warmup):
+            fn()
+        profiling.AGGREGATE.reset()
+        for _ in range(repeat):
+            fn()
+        span = profiling.AGGREGATE.summary()["spans"][name]
+    finally:
+        if previous is None:
+            os.environ.pop("KYODAI_PROFILE")
+        else:
+            os.environ["KYODAI_PROFILE"] = previous
+    return {"median_ms": span["p50_ms"], "p95_ms": span["p95_ms"], "repeat": span["count"]}
+
+
+def bench_pages(quick=False, history_records=1_000):
+    from streamlit.testing.v1 import AppTest
+
+    repeat = 5 if quick else 15
+    owner = "bench"
+    _seed_history(owner, history_records)
+
+    def new_app():
+        at = AppTest.from_file(str(APP_PATH), default_timeout=60)
+        at.session_state["history_owner"] = owner
+        return at.run()
+
+    results = {}
+    results["page.first_run"] = _timeit(new_app, repeat=max(3, repeat // 3), warmup=1)
+
+    at = new_app()
+    univs = ["京都大学 (文系)", "一橋大学"]
+    state = {"i": 0}
+
+    def switch_faculty():
+        state["i"] += 1
+        at.selectbox[0].select(univs[state["i"] % 2]).run()
+
+    results["page.switch_faculty"] = _timeit(switch_faculty, repeat)
+
+    at.selectbox[0].select("京都大学 (文系)").run()
+
+    def edit_common_test():
+        state["i"] += 1
+        jap = next(n for n in at.number_input if n.label == "国語 (200)")
+        jap.set_value(150 + state["i"] % 40).run()
+
+    results["page.edit_common_test"] = _timeit(edit_common_test, repeat)
+
+    def edit_secondary_target():
+        state["i"] += 1
+        at.number_input(key="sim_英語").set_value(float(100 + state["i"] % 80)).run()
+
+    # AppTest は fragment 内の入力でもスクリプト全体を再実行するので、こちらは全体の再実行の時間。
+    # ブラウザで fragment だけが再実行されるときの目安は、同じ操作での fragment 関数本体の時間で測る
+    results["page.edit_secondary_full_rerun"] = _timeit(edit_secondary_target, repeat)
+    results["page.fragment.allocation"] = _fragment_span(edit_secondary_target, "allocation", repeat)
+
+    def save_history():
+        # 余裕の有無で保存ボタンのキーが変わる
+        key = "save_success" if any(b.key == "save_success" for b in at.button) else "save_fail"
+        at.button(key=key).click().run()
+
+    r = _timeit(save_history, repeat)
+    r["existing_records"] = history_records
+    results["page.save_history"] = r
+    return results
+
+
+# ==========================================
+# 3. 起動時間・セッションあたりメモリ (別プロセス)
+# ==========================================
+# 新しいプロセスで「import → アプリを 1 回実行」するまでの時間と、その時点で
+# 読み込まれている重いモジュールを測る。スナップショットは作成済みの状態で測る。
+_COLD_START_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(sys.argv[1], default_timeout=120).run()
+elapsed = (time.perf_counter() - start) * 1000
+assert not at.exception, at.exception
+print(json.dumps({"ms": elapsed, "loaded": [m for m in sys.argv[2:] if m in sys.modules]}))
+"""
+
+# 捨てセッションで全経路 (最適配分・合格確率・保存を含む) を 1 周して遅延 import を済ませたあと、
+# N セッションを生かしたまま、それぞれ初回表示 + 操作 CYCLES 周を交互に進めて RSS の増分を測る
+_MEMORY_SCRIPT = """
+import json, sys
+sys.path.insert(0, sys.argv[1])
+from benchmarks.loadtest import CYCLE_STEPS, SimulatedSession, _rss_bytes, _state_bytes
+n, cycles = int(sys.argv[2]), int(sys.argv[3])
+SimulatedSession("warmup", 0).warm_up()
+before = _rss_bytes()
+sessions = [SimulatedSession(f"mem-{i}", i) for i in range(n)]
+for _ in range(1 + cycles * CYCLE_STEPS):
+    for s in sessions:
+        s.step()
+after = _rss_bytes()
+print(json.dumps({"mb": (after - before) / n / 2**20,
+                  "state_bytes": sum(_state_bytes(s.at) for s in sessions) / n}))
+"""
+
+
+def _run_probe(script, *args):
+    out = subprocess.run(
+        [sys.executable, "-c", script, *map(str, args)],
+        cwd=ROOT, capture_output=True, text=True, check=True, env={**os.environ, "PYTHONPATH": str(ROOT)},
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def bench_startup(quick=False, sessions=20, cycles=2):
+    from kyodai import snapshot
+
+    snapshot.load()
+    results = {}
+
+    runs = [_run_probe(_COLD_START_SCRIPT, APP_PATH, *LAZY_MODULES) for _ in range(3 if quick else 5)]
+    samples = sorted(r["ms"] for r in runs)
+    results["startup.cold_first_run"] = {
+        "median_ms": statistics.median(samples),
+        "min_ms": samples[0],
+        "max_ms": samples[-1],  # 数回しか測らないので p95 ではなく最大値
+        "repeat": len(samples),
+        "lazy_modules_loaded": sorted({m for r in runs for m in r["loaded"]}),
+    }
+
+    n = max(2, sessions // 2) if quick else sessions
+    mem = [_run_probe(_MEMORY_SCRIPT, ROOT, n, cycles) for _ in range(1 if quick else 3)]
+    mbs = sorted(m["mb"] for m in mem)
+    results["memory.per_session"] = {
+        "median_mb": statistics.median(mbs),
+        "min_mb": mbs[0],
+        "sessions": n,
+        "cycles": cycles,
+        "repeat": len(mbs),
+        "state_bytes": statistics.median(m["state_bytes"] for m in mem),
+    }
+    return results
+
+
+# ==========================================
+# 4. 実行・保存・比較
+# ==========================================
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _value(r):
+    # 時間の項目は median_ms、メモリの項目は median_mb で比べる
+    return r["median_ms"] if "median_ms" in r else r["median_mb"]
+
+
+def compare(current, baseline, threshold):
+    regressions = []
+    print(f"{'benchmark':<32}{'base':>12}{'now':>12}{'ratio':>10}")
+    for name, now in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            print(f"{name:<32}{'-':>12}{_value(now):>12.2f}{'new':>10}")
+            continue
+        ratio = _value(now) / _value(base) if _value(base) else float("inf")
+        flag = ""
+        noise = MEMORY_NOISE_MB if "median_mb" in now else 0.0
+        if ratio > 1 + threshold and _value(now) - _value(base) > noise:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:<32}{_value(base):>12.2f}{_value(now):>12.2f}{ratio:>9.2f}x{flag}")
+    return regressions
+
+
+def check_targets(results):
+    missed = []
+    for name, target in TARGETS.items():
+        r = results.get(name)
+        if r is None:
+            continue
+        for key, limit in target.items():
+            if r[key] > limit:
+                missed.append(name)
+                print(f"{name:<32}{key} {r[key]:.2f} > 目標 {limit:g}  TARGET MISSED")
+        if r.get("lazy_modules_loaded"):
+            missed.append(name)
+            print(f"{name:<32}初回表示で {', '.join(r['lazy_modules_loaded'])} が読み込まれています  TARGET MISSED")
+    return missed
+
+
+def trend(names=tuple(TARGETS)):
+    # 保存済みの結果 JSON を日時順に並べ、指定項目の推移を表示する
+    reports = []
+    for path in RESULTS_DIR.glob("*.json"):
+        try:
+            reports.append(json.loads(path.read_text(encoding="utf-8")))
+        except (OSError, ValueError):
+            continue
+    reports.sort(key=lambda r: r.get("created_at", ""))
+    print(f"{'created_at':<22}{'commit':<10}" + "".join(f"{n:>26}" for n in names))
+    for r in reports:
+        cells = []
+        for n in names:
+            v = r.get("results", {}).get(n)
+            cells.append(f"{_value(v):>26.2f}" if v else f"{'-':>26}")
+        print(f"{r.get('created_at', '?'):<22}{r.get('commit', '?'):<10}" + "".join(cells))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="換算スループットとページ再実行レイテンシのベンチマーク")
+    parser.add_argument("--only", choices=["scoring", "pages", "startup"], help="一部のベンチだけ実行")
+    parser.add_argument("--quick", action="store_true", help="件数・繰り返しを減らして短時間で実行")
+    parser.add_argument("--history-records", type=int, default=1_000, help="履歴保存ベンチで事前に入れておく件数")
+    parser.add_argument("-o", "--output", help="結果 JSON の保存先 (省略時は benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", help="比較対象の結果 JSON")
+    parser.add_argument("--threshold", type=float, default=0.2, help="遅くなったとみなす割合 (0.2 = 20%%)")
+    parser.add_argument("--trend", action="store_true", help="保存済みの結果から起動時間・メモリの推移を表示して終了")
+    args = parser.parse_args(argv)
+
+    if args.trend:
+        trend()
+        return 0
+
+    # 履歴 DB・スナップショットは一時ディレクトリに作り、手元のデータを汚さない
+    workdir = tempfile.mkdtemp(prefix="kyodai-bench-")
+    os.environ["KYODAI_DATA_DIR"] = workdir
+    os.environ["KYODAI_CACHE_DIR"] = workdir
+    sys.path.insert(0, str(ROOT))
+
+    results = {}
+    if args.only in (None, "scoring"):
+        results.update(bench_scoring(args.quick))
+    if args.only in (None, "pages"):
+        results.update(bench_pages(args.quick, args.history_records))
+    if args.only in (None, "startup"):
+        results.update(bench_startup(args.quick))
+
+    commit = _git_commit()
+    report = {
+        "commit": commit,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "quick": args.quick,
+        "results": results,
+    }
+    out = Path(args.output) if args.output else RESULTS_DIR / f"{commit}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+
+    for name, r in results.items():
+        if "median_mb" in r:
+            print(f"{name:<32}median {r['median_mb']:>10.2f} MB  ({r['sessions']} sessions)")
+            continue
+        extra = f"  {r['scores_per_sec']:,.0f} scores/s" if "scores_per_sec" in r else ""
+        spread = f"p95 {r['p95_ms']:>10.2f}" if "p95_ms" in r else f"max {r['max_ms']:>10.2f}"
+        print(f"{name:<32}median {r['median_ms']:>10.2f} ms  {spread} ms{extra}")
+    print(f"-> {out}")
+
+    failed = bool(check_targets(results))
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        failed |= bool(compare(report, baseline, args.threshold))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+# 大学入試 合格判定シミュレーター の計算パッケージ
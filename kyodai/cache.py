@@ -0,0 +1,100 @@
+# ==========================================
+# セッション横断の計算結果キャッシュ (LRU)
+# ==========================================
+# Streamlit の全セッションは同じプロセスで動くので、モジュール変数に置いた
+# キャッシュは全員で共有される。同じクラスの生徒が同じ学部・同じ点数を入れれば
+# 2 人目以降は辞書参照だけで済む。名前付きで登録し、管理者ページで
+# ヒット / ミス / 追い出し件数を確認できる。
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import wraps
+
+DEFAULT_MAXSIZE = 4096
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    name: str
+    size: int
+    maxsize: int
+    hits: int
+    misses: int
+    evictions: int
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class ResultCache:
+    def __init__(self, name, maxsize=DEFAULT_MAXSIZE):
+        self.name = name
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_compute(self, key, compute):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+        # 計算はロックの外で行う (同じキーを同時に計算しても結果は同じ)
+        value = compute()
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        with self._lock:
+            return CacheStats(self.name, len(self._data), self.maxsize, self.hits, self.misses, self.evictions)
+
+
+def get_cache(name, maxsize=DEFAULT_MAXSIZE):
+    with _registry_lock:
+        cache = _registry.get(name)
+        if cache is None:
+            cache = _registry[name] = ResultCache(name, maxsize)
+        return cache
+
+
+def all_stats():
+    with _registry_lock:
+        caches = list(_registry.values())
+    return [c.stats() for c in caches]
+
+
+def memoize(name, maxsize=DEFAULT_MAXSIZE):
+    # 位置引数 (すべてハッシュ可能であること) をキーにした共有キャッシュ付き関数にする
+    cache = get_cache(name, maxsize)
+
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args):
+            return cache.get_or_compute(args, lambda: fn(*args))
+
+        wrapper.cache = cache
+        return wrapper
+
+    return decorator
@@ -0,0 +1,96 @@
+# ==========================================
+# コマンドライン入口 (python -m kyodai ...)
+# ==========================================
+import argparse
+import os
+import sys
+import time
+
+from kyodai import cohort, report, snapshot
+from kyodai.data import DEFAULT_YEAR, DataError, available_years
+
+
+def _cmd_score(args):
+    dst = args.output or f"{os.path.splitext(args.input)[0]}_scored.csv"
+    start = time.perf_counter()
+    rows = cohort.score_file(
+        args.input, dst,
+        univ=args.univ, faculty=args.faculty,
+        chunk_size=args.chunk_size, workers=args.workers,
+        id_columns=tuple(args.id_column), year=args.year,
+    )
+    elapsed = time.perf_counter() - start
+    print(f"{rows} 件を換算しました -> {dst} ({elapsed:.2f} 秒)", file=sys.stderr)
+
+
+def _cmd_report(args):
+    out_dir = args.output_dir or f"{os.path.splitext(args.input)[0]}_reports"
+    start = time.perf_counter()
+
+    def progress(done, total):
+        rate = done / max(time.perf_counter() - start, 1e-9)
+        print(f"\r{done} / {total} 件 ({rate:.0f} 件/秒)", end="", file=sys.stderr, flush=True)
+
+    written, skipped = report.generate_reports(
+        args.input, out_dir, fmt=args.format,
+        univ=args.univ, faculty=args.faculty, id_column=args.id_column,
+        chunk_size=args.chunk_size, workers=args.workers, year=args.year,
+        resume=not args.restart, progress=progress,
+    )
+    elapsed = time.perf_counter() - start
+    print(f"\n{written} 件の判定シートを作成しました (作成済みで省略: {skipped} 件) -> {out_dir} ({elapsed:.2f} 秒)",
+          file=sys.stderr)
+
+
+def _cmd_compile_data(args):
+    years = args.year or available_years()
+    for year in years:
+        path = snapshot.build(year)
+        table = snapshot.read(path)
+        print(f"{year} 年度: {len(table.univs)} 大学 / {len(table)} 学部 -> {path}", file=sys.stderr)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="kyodai", description="大学入試 合格判定シミュレーター (バッチ処理)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("score", help="模試結果ファイルを全学部の共テ換算・二次必要点に変換する")
+    p.add_argument("input", help=f"入力 CSV / Parquet (列: {cohort.TRACK_COLUMN} (文系 / 理系), "
+                   + ", ".join(cohort.CENTER_COLUMNS) + ")")
+    p.add_argument("-o", "--output", help="出力 CSV / Parquet (省略時は <入力>_scored.csv)")
+    p.add_argument("--univ", help="対象大学 (省略時は全大学)")
+    p.add_argument("--faculty", help="対象学部・方式 (省略時は全学部)")
+    p.add_argument("--chunk-size", type=int, default=cohort.DEFAULT_CHUNK_SIZE, help="1 チャンクの行数")
+    p.add_argument("-j", "--workers", type=int, default=1, help="並列プロセス数")
+    p.add_argument("--id-column", action="append", default=[], help="出力にそのまま残す列 (複数指定可)")
+    p.add_argument("--year", type=int, default=DEFAULT_YEAR, help="入試年度")
+    p.set_defaults(func=_cmd_score)
+
+    p = sub.add_parser("report", help="模試結果ファイルから生徒ごとの判定シートを作成する")
+    p.add_argument("input", help=f"入力 CSV / Parquet (列: 生徒ID, {cohort.TRACK_COLUMN} (文系 / 理系), "
+                   + ", ".join(cohort.CENTER_COLUMNS) + "、任意で secondary_ratio)")
+    p.add_argument("-o", "--output-dir", help="出力先ディレクトリ (省略時は <入力>_reports)")
+    p.add_argument("-f", "--format", choices=report.FORMATS, default="html", help="出力形式")
+    p.add_argument("--univ", help="対象大学 (省略時は全大学)")
+    p.add_argument("--faculty", help="対象学部・方式 (省略時は全学部)")
+    p.add_argument("--id-column", default="student_id", help="生徒 ID の列名 (ファイル名に使う)")
+    p.add_argument("--chunk-size", type=int, default=report.DEFAULT_CHUNK_SIZE, help="1 チャンクの人数")
+    p.add_argument("-j", "--workers", type=int, default=1, help="並列プロセス数")
+    p.add_argument("--year", type=int, default=DEFAULT_YEAR, help="入試年度")
+    p.add_argument("--restart", action="store_true", help="作成済みの記録を消して最初から作り直す")
+    p.set_defaults(func=_cmd_report)
+
+    p = sub.add_parser("compile-data", help="入試データ JSON を検証してスナップショットにコンパイルする")
+    p.add_argument("--year", type=int, action="append", help="対象年度 (省略時は全年度、複数指定可)")
+    p.set_defaults(func=_cmd_compile_data)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        args.func(args)
+    except (DataError, ValueError, FileNotFoundError) as e:
+        print(f"エラー: {e}", file=sys.stderr)
+        return 1
+    return 0
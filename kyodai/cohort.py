@@ -0,0 +1,182 @@
+# ==========================================
+# 模試結果ファイルの一括換算 (チャンク読み書き)
+# ==========================================
+# CSV / Parquet をチャンク単位で読み、各チャンクを換算して即座に書き出す。
+# メモリ使用量はファイルサイズではなくチャンクサイズで決まる。
+# 出力は一時ファイルに書き、全チャンクが成功したときだけ出力先に置き換える。
+#
+# soc / sci 列の意味は入力フォームで違う (文系: 地歴公民 2 科目 /200・理科 /100、
+# 理系: 地歴公民 /100・理科 2 科目 /200) ので、各行は track 列 (文系 / 理系) を必須とし、
+# 同じ区分の学部だけを換算する。他区分の学部の列は空欄になる。
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from kyodai.data import DEFAULT_YEAR
+from kyodai.engine import CENTER_COLUMNS, RAW_CAP, get_table
+
+DEFAULT_CHUNK_SIZE = 50_000
+TRACK_COLUMN = "track"
+TRACKS = {"文系": False, "理系": True}
+_MAX_REPORTED_ROWS = 10
+
+
+def _is_parquet(path):
+    return Path(path).suffix.lower() in (".parquet", ".pq")
+
+
+def select_faculties(table, univ=None, faculty=None):
+    idx = [
+        i for i, (u, f) in enumerate(table.keys)
+        if (univ is None or u == univ) and (faculty is None or f == faculty)
+    ]
+    if not idx:
+        raise ValueError(f"該当する大学・学部がありません: {univ} {faculty or ''}".rstrip())
+    return np.array(idx, dtype=np.intp)
+
+
+def output_columns(table, faculty_idx):
+    cols = []
+    for i in faculty_idx:
+        univ, fac = table.keys[i]
+        prefix = f"{univ}/{fac}"
+        cols += [f"{prefix}:共テ換算", f"{prefix}:二次必要点", f"{prefix}:到達可能"]
+    return cols
+
+
+def read_raw(chunk):
+    # チャンクから (素点 (N, S), 理系フラグ (N,)) を取り出す。
+    # 区分が不明・欠損・数値でない・0 未満・満点超えの行が 1 つでもあれば ValueError
+    missing = [c for c in (TRACK_COLUMN, *CENTER_COLUMNS) if c not in chunk.columns]
+    if missing:
+        raise ValueError(f"入力ファイルに必要な列がありません: {', '.join(missing)}")
+
+    track = chunk[TRACK_COLUMN].astype(str).str.strip().map(TRACKS)
+    is_science = track.fillna(False).to_numpy(dtype=bool)
+    raw = chunk[list(CENTER_COLUMNS)].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64)
+    caps = np.where(is_science[:, None], np.array(RAW_CAP[True]), np.array(RAW_CAP[False]))
+    with np.errstate(invalid="ignore"):
+        bad = track.isna().to_numpy() | np.isnan(raw).any(axis=1) | (raw < 0).any(axis=1) | (raw > caps).any(axis=1)
+    if bad.any():
+        rows = [str(i + 1) for i in chunk.index[bad][:_MAX_REPORTED_ROWS]]
+        more = f" ほか {int(bad.sum()) - len(rows)} 行" if bad.sum() > len(rows) else ""
+        raise ValueError(
+            f"不正な行があります (データ {', '.join(rows)} 行目{more})。"
+            f"{TRACK_COLUMN} は {' / '.join(TRACKS)}、素点は欠損なしで 0 〜 満点にしてください"
+        )
+    return raw, is_science
+
+
+def score_chunk(chunk, faculty_idx, id_columns=(), year=DEFAULT_YEAR):
+    # ProcessPool のワーカーからも呼ばれるので、テーブルはプロセスごとに get_table() で取得
+    table = get_table(year)
+    raw, is_science = read_raw(chunk)
+
+    weights = table.weights[faculty_idx]
+    center = raw @ weights.T
+    required = table.pass_score_mean[faculty_idx] - center
+    feasible = required <= table.secondary_max[faculty_idx]
+    # 行と学部の区分が違う組み合わせは換算しない
+    other_track = is_science[:, None] != table.is_science[faculty_idx]
+
+    # 学部ごとに [換算, 必要点, 可否] の 3 列が並ぶ横持ち
+    names = output_columns(table, faculty_idx)
+    data = {}
+    for j in range(len(faculty_idx)):
+        data[names[3 * j]] = np.where(other_track[:, j], np.nan, np.round(center[:, j], 2))
+        data[names[3 * j + 1]] = np.where(other_track[:, j], np.nan, np.round(np.maximum(required[:, j], 0.0), 2))
+        data[names[3 * j + 2]] = pd.arrays.BooleanArray(feasible[:, j], other_track[:, j])
+    out = pd.DataFrame(data, index=chunk.index)
+
+    if id_columns:
+        out = pd.concat([chunk[list(id_columns)], out], axis=1)
+    return out
+
+
+def read_chunks(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    if _is_parquet(path):
+        import pyarrow.parquet as pq
+
+        # CSV と同じく、インデックスはファイル全体での行番号 (0 始まり) にそろえる
+        offset = 0
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            chunk = batch.to_pandas()
+            chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+            offset += len(chunk)
+            yield chunk
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size)
+
+
+class ChunkWriter:
+    # 一時ファイルに書き、commit() で出力先に置き換える (途中で失敗しても中途半端なファイルを残さない)
+    def __init__(self, path):
+        self.path = Path(path)
+        self.parquet = _is_parquet(path)
+        self._tmp = self.path.with_name(f".{self.path.name}.tmp")
+        self._writer = None
+        self._header = True
+
+    def write(self, df):
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            tbl = pa.Table.from_pandas(df, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self._tmp, tbl.schema)
+            self._writer.write_table(tbl)
+        else:
+            df.to_csv(self._tmp, mode="w" if self._header else "a", header=self._header, index=False)
+            self._header = False
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def commit(self):
+        self.close()
+        if self._tmp.exists():
+            os.replace(self._tmp, self.path)
+
+    def discard(self):
+        self.close()
+        self._tmp.unlink(missing_ok=True)
+
+
+def map_chunks(fn, chunks, workers, *args):
+    # 各チャンクに fn(chunk, *args) を適用した結果を入力と同じ順に返す。
+    # workers > 1 ならプロセスプールで計算し、先読みするチャンク数を workers * 2 に制限してメモリを一定に保つ
+    if workers <= 1:
+        for chunk in chunks:
+            yield fn(chunk, *args)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(fn, chunk, *args))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def score_file(src, dst, univ=None, faculty=None, chunk_size=DEFAULT_CHUNK_SIZE,
+               workers=1, id_columns=(), year=DEFAULT_YEAR):
+    faculty_idx = select_faculties(get_table(year), univ, faculty)
+    writer = ChunkWriter(dst)
+    rows = 0
+    try:
+        for out in map_chunks(score_chunk, read_chunks(src, chunk_size), workers, faculty_idx, id_columns, year):
+            writer.write(out)
+            rows += len(out)
+    except BaseException:
+        writer.discard()
+        raise
+    writer.commit()
+    return rows
@@ -0,0 +1,157 @@
+# ==========================================
+# 大学・学部データの読み込みと検証
+# ==========================================
+# 入試データは年度ごとの JSON (kyodai/datasets/<年度>.json) で管理する。
+# 読み込み時にスキーマと配点の整合性を検証し、プロセス内でキャッシュする。
+# 画面・バッチ処理はここを直接使わず、kyodai.snapshot のコンパイル済み
+# スナップショット経由で読むのが基本。
+import json
+from functools import lru_cache
+from pathlib import Path
+
+DATASET_DIR = Path(__file__).resolve().parent / "datasets"
+DEFAULT_YEAR = 2026
+
+WEIGHT_KEYS = ("jap", "math", "eng", "soc", "sci", "info")
+ENG_RULE_NAMES = ("kyodai_special", "normal_sum")
+REQUIRED_FIELDS = ("center_max", "secondary_max", "secondary_subjects", "weights", "pass_score_mean", "eng_rule")
+OPTIONAL_FIELDS = ("note", "pass_history")
+# pass_history の各年度: year は必須、min / mean / max / bands ([[下限, 上限, 人数], ...]) は任意
+PASS_HISTORY_FIELDS = ("year", "min", "mean", "max", "bands")
+
+# 共通テスト素点の満点 (文系: 地歴2・理科1 / 理系: 地歴1・理科2)
+# 英語は kyodai_special (R*1.5 + L*0.5) でも normal_sum (R + L) でも 200 点
+RAW_MAX = {
+    False: {"jap": 200, "math": 200, "eng": 200, "soc": 200, "sci": 100, "info": 100},
+    True: {"jap": 200, "math": 200, "eng": 200, "soc": 100, "sci": 200, "info": 100},
+}
+_TOLERANCE = 1e-6
+
+
+class DataError(ValueError):
+    pass
+
+
+def dataset_path(year):
+    return DATASET_DIR / f"{year}.json"
+
+
+def available_years():
+    return sorted(int(p.stem) for p in DATASET_DIR.glob("*.json") if p.stem.isdigit())
+
+
+def _is_number(v):
+    return isinstance(v, (int, float)) and not isinstance(v, bool)
+
+
+def _validate_faculty(where, fac, is_science):
+    errors = []
+    if not isinstance(fac, dict):
+        return [f"{where}: 学部データが辞書ではありません"]
+
+    missing = [k for k in REQUIRED_FIELDS if k not in fac]
+    unknown = [k for k in fac if k not in REQUIRED_FIELDS + OPTIONAL_FIELDS]
+    if missing:
+        errors.append(f"{where}: 必須項目がありません: {', '.join(missing)}")
+    if unknown:
+        errors.append(f"{where}: 不明な項目があります: {', '.join(unknown)}")
+    if missing:
+        return errors
+
+    for key in ("center_max", "secondary_max", "pass_score_mean"):
+        if not _is_number(fac[key]) or fac[key] < 0:
+            errors.append(f"{where}: {key} は 0 以上の数値にしてください ({fac[key]!r})")
+
+    if fac["eng_rule"] not in ENG_RULE_NAMES:
+        errors.append(f"{where}: eng_rule が不正です ({fac['eng_rule']!r})")
+
+    weights = fac["weights"]
+    if not isinstance(weights, dict) or set(weights) != set(WEIGHT_KEYS):
+        errors.append(f"{where}: weights のキーは {', '.join(WEIGHT_KEYS)} の 6 つにしてください")
+    elif not all(_is_number(v) and v >= 0 for v in weights.values()):
+        errors.append(f"{where}: weights は 0 以上の数値にしてください")
+    elif _is_number(fac["center_max"]):
+        raw_max = RAW_MAX[is_science]
+        expected = sum(weights[k] * raw_max[k] for k in WEIGHT_KEYS)
+        if abs(expected - fac["center_max"]) > _TOLERANCE:
+            errors.append(f"{where}: center_max {fac['center_max']} が weights からの計算値 {expected:g} と一致しません")
+
+    subjects = fac["secondary_subjects"]
+    if not isinstance(subjects, dict) or not subjects:
+        errors.append(f"{where}: secondary_subjects は科目名 → 満点 の辞書にしてください")
+    elif not all(_is_number(v) and v > 0 for v in subjects.values()):
+        errors.append(f"{where}: secondary_subjects の満点は正の数値にしてください")
+    elif _is_number(fac["secondary_max"]):
+        total = sum(subjects.values())
+        if abs(total - fac["secondary_max"]) > _TOLERANCE:
+            errors.append(f"{where}: secondary_max {fac['secondary_max']} が secondary_subjects の合計 {total:g} と一致しません")
+
+    if "pass_history" in fac:
+        errors.extend(_validate_pass_history(where, fac["pass_history"]))
+    return errors
+
+
+def _validate_pass_history(where, history):
+    if not isinstance(history, list):
+        return [f"{where}: pass_history は年度ごとの辞書のリストにしてください"]
+    errors = []
+    for entry in history:
+        if not isinstance(entry, dict) or not isinstance(entry.get("year"), int):
+            errors.append(f"{where}: pass_history の各要素には year (整数) が必要です")
+            continue
+        at = f"{where}: pass_history {entry['year']}"
+        unknown = [k for k in entry if k not in PASS_HISTORY_FIELDS]
+        if unknown:
+            errors.append(f"{at}: 不明な項目があります: {', '.join(unknown)}")
+        stats = [entry[k] for k in ("min", "mean", "max") if k in entry]
+        if not all(_is_number(v) and v >= 0 for v in stats):
+            errors.append(f"{at}: min / mean / max は 0 以上の数値にしてください")
+        elif stats != sorted(stats):
+            errors.append(f"{at}: min <= mean <= max になっていません")
+        bands = entry.get("bands", [])
+        if not isinstance(bands, list) or not all(
+            isinstance(b, list) and len(b) == 3 and all(_is_number(v) for v in b) and b[0] <= b[1] and b[2] >= 0
+            for b in bands
+        ):
+            errors.append(f"{at}: bands は [下限, 上限, 人数] のリストにしてください")
+        elif bands and sum(b[2] for b in bands) <= 0:
+            errors.append(f"{at}: bands の人数の合計が 0 です")
+    return errors
+
+
+def validate(universities):
+    errors = []
+    if not isinstance(universities, dict) or not universities:
+        raise DataError("universities が空か、辞書ではありません")
+    for univ, faculties in universities.items():
+        if not isinstance(faculties, dict) or not faculties:
+            errors.append(f"{univ}: 学部がありません")
+            continue
+        for name, fac in faculties.items():
+            errors.extend(_validate_faculty(f"{univ} / {name}", fac, "理系" in univ))
+    if errors:
+        raise DataError("入試データの検証に失敗しました:\n" + "\n".join(f"  - {e}" for e in errors))
+
+
+def read_dataset(path):
+    with open(path, encoding="utf-8") as f:
+        doc = json.load(f)
+    if not isinstance(doc, dict) or "universities" not in doc:
+        raise DataError(f"{path}: universities がありません")
+    validate(doc["universities"])
+    return doc
+
+
+@lru_cache(maxsize=None)
+def load_data(year=DEFAULT_YEAR):
+    path = dataset_path(year)
+    if not path.exists():
+        raise DataError(f"{year} 年度の入試データがありません ({path})")
+    return read_dataset(path)["universities"]
+
+
+def __getattr__(name):
+    # 旧来の `from kyodai.data import UNIVERSITY_DATA` は初回参照時に読み込む
+    if name == "UNIVERSITY_DATA":
+        return load_data(DEFAULT_YEAR)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,209 @@
+# ==========================================
+# 共通テスト換算エンジン (一括計算対応)
+# ==========================================
+# 全学部の配点を (学部数 M × 入力科目数 S) の重み行列にまとめ、
+# (受験者数 N × S) の素点配列を 1 回の行列積で換算する。
+# 英語の R/L 比 (kyodai_special = 1.5 : 0.5, normal_sum = 1 : 1) も
+# 学部ごとの係数として行列に畳み込んでいる。
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+
+from kyodai.cache import get_cache
+from kyodai.data import DEFAULT_YEAR, ENG_RULE_NAMES, WEIGHT_KEYS
+
+# 素点入力の列順 (soc / sci は文系・理系フォームでの合計値)
+CENTER_COLUMNS = ("jap", "m1", "m2", "eng_r", "eng_l", "soc", "sci", "info")
+COL = {name: i for i, name in enumerate(CENTER_COLUMNS)}
+CENTER_LABELS = {
+    "jap": "国語", "m1": "数学IA", "m2": "数学IIBC", "eng_r": "英語R", "eng_l": "英語L",
+    "soc": "地歴公民", "sci": "理科", "info": "情報",
+}
+
+# 素点入力の各列の満点 (soc / sci は文系・理系フォームで異なる)
+RAW_CAP = {
+    False: (200, 100, 100, 100, 100, 200, 100, 100),
+    True: (200, 100, 100, 100, 100, 100, 200, 100),
+}
+
+# 英語 R/L にかける倍率
+ENG_RULES = {
+    "kyodai_special": (1.5, 0.5),
+    "normal_sum": (1.0, 1.0),
+}
+
+
+def faculty_weight_row(faculty):
+    w = faculty["weights"]
+    eng_r, eng_l = ENG_RULES[faculty["eng_rule"]]
+    return [
+        w["jap"],
+        w["math"],
+        w["math"],
+        w["eng"] * eng_r,
+        w["eng"] * eng_l,
+        w["soc"],
+        w["sci"],
+        w["info"],
+    ]
+
+
+@dataclass(frozen=True)
+class CenterVerdict:
+    total_center: float        # 共テ換算得点
+    score_info: float          # 情報の換算点
+    required_secondary: float  # 二次試験必要点 (目標点 - 共テ換算)
+
+
+@dataclass(frozen=True)
+class FacultyTable:
+    year: int
+    version: str             # データ版 (年度 + 元 JSON のハッシュ)。キャッシュのキーに使う
+    keys: tuple              # ((大学, 学部), ...) 長さ M
+    weights: np.ndarray      # (M, S) float64
+    center_max: np.ndarray   # (M,)
+    secondary_max: np.ndarray
+    pass_score_mean: np.ndarray
+    is_science: np.ndarray   # (M,) bool  理系フォームで入力する学部
+    univs: tuple             # 大学名 (出現順)
+    univ_code: np.ndarray    # (M,) int  univs 内の位置
+    secondary_names: tuple   # 学部ごとの二次科目名 tuple
+    secondary_points: np.ndarray  # (M, K) 二次科目の満点 (科目数 K に満たない分は 0 埋め)
+    base_weights: np.ndarray  # (M, 6) 元データの weights (WEIGHT_KEYS 順)
+    eng_rule: np.ndarray     # (M,) ENG_RULE_NAMES 内の位置
+
+    def __len__(self):
+        return len(self.keys)
+
+    def index(self, univ, faculty):
+        return self._positions()[(univ, faculty)]
+
+    def faculties(self, univ):
+        code = self.univs.index(univ)
+        return [self.keys[i][1] for i in np.flatnonzero(self.univ_code == code)]
+
+    def faculty(self, idx):
+        # 元データと同じ形の辞書 (画面表示用)
+        names = self.secondary_names[idx]
+        return {
+            "center_max": _num(self.center_max[idx]),
+            "secondary_max": _num(self.secondary_max[idx]),
+            "secondary_subjects": {n: _num(v) for n, v in zip(names, self.secondary_points[idx])},
+            "weights": dict(zip(WEIGHT_KEYS, self.base_weights[idx].tolist())),
+            "pass_score_mean": _num(self.pass_score_mean[idx]),
+            "eng_rule": ENG_RULE_NAMES[int(self.eng_rule[idx])],
+        }
+
+    def _positions(self):
+        # frozen dataclass なので辞書は初回に作って object.__setattr__ で保持
+        pos = self.__dict__.get("_pos")
+        if pos is None:
+            pos = {key: i for i, key in enumerate(self.keys)}
+            object.__setattr__(self, "_pos", pos)
+        return pos
+
+    def score(self, raw):
+        # raw: (N, S) または (S,) → (N, M) または (M,)
+        raw = np.asarray(raw, dtype=np.float64)
+        return raw @ self.weights.T
+
+    def contributions(self, raw, idx):
+        # 1 学部分の科目別換算点 (S,)
+        return np.asarray(raw, dtype=np.float64) * self.weights[idx]
+
+    def required_secondary(self, center_scores, target=None):
+        # target 省略時は各学部の pass_score_mean を目標点とする
+        if target is None:
+            target = self.pass_score_mean
+        return np.asarray(target, dtype=np.float64) - center_scores
+
+    def feasible(self, required):
+        return required <= self.secondary_max
+
+
+def raw_caps(table):
+    # (M, S) 各学部の入力フォームでの素点満点
+    return np.where(
+        table.is_science[:, None],
+        np.array(RAW_CAP[True], dtype=np.float64),
+        np.array(RAW_CAP[False], dtype=np.float64),
+    )
+
+
+def _num(v):
+    # 150.0 → 150 のように、整数値は int に戻して表示を元データと揃える
+    v = float(v)
+    return int(v) if v.is_integer() else v
+
+
+def compile_table(data, year=DEFAULT_YEAR, version=None):
+    keys, rows = [], []
+    center_max, secondary_max, pass_mean, is_science = [], [], [], []
+    univ_code, secondary, base_weights, eng_rule = [], [], [], []
+    for u, (univ, faculties) in enumerate(data.items()):
+        for name, fac in faculties.items():
+            univ_code.append(u)
+            base_weights.append([fac["weights"][k] for k in WEIGHT_KEYS])
+            eng_rule.append(ENG_RULE_NAMES.index(fac["eng_rule"]))
+            keys.append((univ, name))
+            rows.append(faculty_weight_row(fac))
+            center_max.append(fac["center_max"])
+            secondary_max.append(fac["secondary_max"])
+            pass_mean.append(fac["pass_score_mean"])
+            is_science.append("理系" in univ)
+            secondary.append(fac["secondary_subjects"])
+    return FacultyTable(
+        year=year,
+        version=version or str(year),
+        keys=tuple(keys),
+        weights=np.array(rows, dtype=np.float64).reshape(len(keys), len(CENTER_COLUMNS)),
+        center_max=np.array(center_max, dtype=np.float64),
+        secondary_max=np.array(secondary_max, dtype=np.float64),
+        pass_score_mean=np.array(pass_mean, dtype=np.float64),
+        is_science=np.array(is_science, dtype=bool),
+        univs=tuple(data.keys()),
+        univ_code=np.array(univ_code, dtype=np.int32),
+        secondary_names=tuple(tuple(subj) for subj in secondary),
+        secondary_points=_pad_secondary(secondary),
+        base_weights=np.array(base_weights, dtype=np.float64).reshape(len(keys), len(WEIGHT_KEYS)),
+        eng_rule=np.array(eng_rule, dtype=np.int8),
+    )
+
+
+def _pad_secondary(secondary):
+    k = max((len(subj) for subj in secondary), default=0)
+    points = np.zeros((len(secondary), k), dtype=np.float64)
+    for i, subj in enumerate(secondary):
+        points[i, :len(subj)] = list(subj.values())
+    return points
+
+
+@lru_cache(maxsize=None)
+def get_table(year=DEFAULT_YEAR):
+    # コンパイル済みスナップショットを memmap で読み、プロセス内で共有する
+    from kyodai import snapshot
+
+    return snapshot.load(year)
+
+
+def center_vector(jap, m1, m2, eng_r, eng_l, soc, sci, info):
+    return np.array([jap, m1, m2, eng_r, eng_l, soc, sci, info], dtype=np.float64)
+
+
+_verdict_cache = get_cache("verdict", maxsize=8192)
+
+
+def faculty_verdict(table, idx, raw, target):
+    # 1 学部・1 人分の判定。共テ換算は (データ版, 大学, 学部, 素点) をキーに全セッションで共有し、
+    # 必要点は呼び出し側の目標点そのままで毎回引く (目標点を丸めると画面の表示とずれるため)
+    raw_key = tuple(round(float(v), 1) for v in raw)
+    univ, faculty = table.keys[idx]
+    key = (table.version, univ, faculty, raw_key)
+
+    def compute():
+        parts = table.contributions(raw_key, idx)
+        return float(parts.sum()), float(parts[COL["info"]])
+
+    total, info = _verdict_cache.get_or_compute(key, compute)
+    return CenterVerdict(total, info, float(target) - total)
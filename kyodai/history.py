@@ -0,0 +1,338 @@
+# ==========================================
+# 計算履歴の永続化 (SQLite / WAL)
+# ==========================================
+# 履歴はセッションごとのリストではなく、プロセスで 1 つ共有する SQLite に保存する。
+# 保存は一旦バッファに積み、まとめて executemany で書き込む。
+# 読み出しは常にページ単位 (LIMIT / OFFSET) で、フィルタも SQL 側で行う。
+#
+# 先生向けの集計 (学部ごとの件数・合格圏率・共テ換算の分布、日ごとの志望先) は
+# 集計テーブルに持ち、履歴を書き込むのと同じトランザクションで差分だけ足し込む。
+# ダッシュボードは集計テーブルを読むだけなので、履歴が何十万件あっても重くならない。
+import atexit
+import math
+import os
+import sqlite3
+import threading
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+
+PAGE_SIZE = 20
+FLUSH_SIZE = 32
+HIST_BIN_WIDTH = 10
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    owner TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    univ TEXT NOT NULL,
+    faculty TEXT NOT NULL,
+    center_score REAL NOT NULL,
+    secondary_total REAL NOT NULL,
+    gap REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_history_owner_created ON history (owner, created_at);
+CREATE INDEX IF NOT EXISTS idx_history_created ON history (created_at);
+CREATE INDEX IF NOT EXISTS idx_history_univ_faculty ON history (univ, faculty);
+
+-- 学部ごとの累計 (件数・合格圏の件数・共テ換算の合計 / 二乗和 / 最小 / 最大)
+CREATE TABLE IF NOT EXISTS stats_faculty (
+    univ TEXT NOT NULL,
+    faculty TEXT NOT NULL,
+    n INTEGER NOT NULL,
+    n_pass INTEGER NOT NULL,
+    center_sum REAL NOT NULL,
+    center_sumsq REAL NOT NULL,
+    center_min REAL NOT NULL,
+    center_max REAL NOT NULL,
+    PRIMARY KEY (univ, faculty)
+);
+-- 学部ごとの共テ換算のヒストグラム (bin = floor(共テ換算 / HIST_BIN_WIDTH))
+CREATE TABLE IF NOT EXISTS stats_center_hist (
+    univ TEXT NOT NULL,
+    faculty TEXT NOT NULL,
+    bin INTEGER NOT NULL,
+    n INTEGER NOT NULL,
+    PRIMARY KEY (univ, faculty, bin)
+);
+-- 日ごとの志望先の件数
+CREATE TABLE IF NOT EXISTS stats_daily (
+    day TEXT NOT NULL,
+    univ TEXT NOT NULL,
+    faculty TEXT NOT NULL,
+    n INTEGER NOT NULL,
+    n_pass INTEGER NOT NULL,
+    PRIMARY KEY (day, univ, faculty)
+);
+"""
+_COLUMNS = ("owner", "created_at", "univ", "faculty", "center_score", "secondary_total", "gap")
+
+_UPSERT_FACULTY = """
+INSERT INTO stats_faculty (univ, faculty, n, n_pass, center_sum, center_sumsq, center_min, center_max)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (univ, faculty) DO UPDATE SET
+    n = n + excluded.n,
+    n_pass = n_pass + excluded.n_pass,
+    center_sum = center_sum + excluded.center_sum,
+    center_sumsq = center_sumsq + excluded.center_sumsq,
+    center_min = min(center_min, excluded.center_min),
+    center_max = max(center_max, excluded.center_max)
+"""
+_UPSERT_HIST = """
+INSERT INTO stats_center_hist (univ, faculty, bin, n) VALUES (?, ?, ?, ?)
+ON CONFLICT (univ, faculty, bin) DO UPDATE SET n = n + excluded.n
+"""
+_UPSERT_DAILY = """
+INSERT INTO stats_daily (day, univ, faculty, n, n_pass) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (day, univ, faculty) DO UPDATE SET n = n + excluded.n, n_pass = n_pass + excluded.n_pass
+"""
+# 集計テーブルができる前の DB 用。既存の履歴から一度だけ作り直す
+_REBUILD_STATS = f"""
+DELETE FROM stats_faculty;
+DELETE FROM stats_center_hist;
+DELETE FROM stats_daily;
+INSERT INTO stats_faculty
+    SELECT univ, faculty, COUNT(*), SUM(gap >= 0), SUM(center_score), SUM(center_score * center_score),
+           MIN(center_score), MAX(center_score)
+    FROM history GROUP BY univ, faculty;
+INSERT INTO stats_center_hist
+    SELECT univ, faculty, CAST(center_score / {HIST_BIN_WIDTH} AS INTEGER) AS b, COUNT(*)
+    FROM history GROUP BY univ, faculty, b;
+INSERT INTO stats_daily
+    SELECT substr(created_at, 1, 10) AS d, univ, faculty, COUNT(*), SUM(gap >= 0)
+    FROM history GROUP BY d, univ, faculty;
+"""
+
+
+def default_path():
+    base = Path(os.environ.get("KYODAI_DATA_DIR", Path.home() / ".local" / "share" / "kyodai"))
+    return base / "history.sqlite3"
+
+
+@dataclass(frozen=True)
+class HistoryRecord:
+    owner: str
+    created_at: str       # "YYYY-MM-DD HH:MM:SS"
+    univ: str
+    faculty: str
+    center_score: float   # 共テ換算
+    secondary_total: float  # 二次目標の合計
+    gap: float            # 二次目標 - 二次必要点 (0 以上なら合格圏)
+
+    @classmethod
+    def now(cls, owner, univ, faculty, center_score, secondary_total, gap):
+        return cls(
+            owner=owner,
+            created_at=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            univ=univ, faculty=faculty,
+            center_score=float(center_score),
+            secondary_total=float(secondary_total),
+            gap=float(gap),
+        )
+
+
+@dataclass(frozen=True)
+class FacultyStats:
+    univ: str
+    faculty: str
+    n: int
+    n_pass: int
+    center_sum: float
+    center_sumsq: float
+    center_min: float
+    center_max: float
+
+    @property
+    def pass_rate(self):
+        return self.n_pass / self.n if self.n else 0.0
+
+    @property
+    def center_mean(self):
+        return self.center_sum / self.n if self.n else 0.0
+
+    @property
+    def center_std(self):
+        if not self.n:
+            return 0.0
+        return math.sqrt(max(0.0, self.center_sumsq / self.n - self.center_mean ** 2))
+
+
+class HistoryStore:
+    def __init__(self, path=None, flush_size=FLUSH_SIZE):
+        self.path = Path(path or default_path())
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.flush_size = flush_size
+        self._lock = threading.Lock()
+        self._pending = []
+        # Streamlit のセッションは別スレッドで動くので、1 接続をロックで共有する
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        if self._stats_missing():
+            self.rebuild_stats()
+        atexit.register(self.flush)
+
+    def _stats_missing(self):
+        has_history = self._conn.execute("SELECT 1 FROM history LIMIT 1").fetchone()
+        has_stats = self._conn.execute("SELECT 1 FROM stats_faculty LIMIT 1").fetchone()
+        return bool(has_history) and not has_stats
+
+    def rebuild_stats(self):
+        # 集計テーブルを履歴全体から作り直す (通常は不要。集計の定義を変えたとき用)
+        with self._lock:
+            self._flush_locked()
+            self._conn.execute("BEGIN")
+            try:
+                for stmt in _REBUILD_STATS.split(";"):
+                    if stmt.strip():
+                        self._conn.execute(stmt)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def add(self, record):
+        with self._lock:
+            self._pending.append(tuple(getattr(record, c) for c in _COLUMNS))
+            if len(self._pending) >= self.flush_size:
+                self._flush_locked()
+
+    def add_many(self, records):
+        with self._lock:
+            self._pending.extend(tuple(getattr(r, c) for c in _COLUMNS) for r in records)
+            self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._pending:
+            return
+        placeholders = ", ".join("?" for _ in _COLUMNS)
+        self._conn.execute("BEGIN")
+        try:
+            self._conn.executemany(
+                f"INSERT INTO history ({', '.join(_COLUMNS)}) VALUES ({placeholders})",
+                self._pending,
+            )
+            self._update_stats(self._pending)
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._pending.clear()
+
+    def _update_stats(self, rows):
+        # 書き込む分だけを集計し、集計テーブルに足し込む
+        faculty = {}
+        hist = defaultdict(int)
+        daily = defaultdict(lambda: [0, 0])
+        for _owner, created_at, univ, fac, center, _secondary, gap in rows:
+            passed = int(gap >= 0)
+            f = faculty.get((univ, fac))
+            if f is None:
+                faculty[(univ, fac)] = [1, passed, center, center * center, center, center]
+            else:
+                f[0] += 1
+                f[1] += passed
+                f[2] += center
+                f[3] += center * center
+                f[4] = min(f[4], center)
+                f[5] = max(f[5], center)
+            hist[(univ, fac, math.floor(center / HIST_BIN_WIDTH))] += 1
+            d = daily[(created_at[:10], univ, fac)]
+            d[0] += 1
+            d[1] += passed
+        self._conn.executemany(_UPSERT_FACULTY, [(*k, *v) for k, v in faculty.items()])
+        self._conn.executemany(_UPSERT_HIST, [(*k, n) for k, n in hist.items()])
+        self._conn.executemany(_UPSERT_DAILY, [(*k, *v) for k, v in daily.items()])
+
+    def _where(self, owner, univ, faculty):
+        clauses, params = ["owner = ?"], [owner]
+        if univ is not None:
+            clauses.append("univ = ?")
+            params.append(univ)
+        if faculty is not None:
+            clauses.append("faculty = ?")
+            params.append(faculty)
+        return " AND ".join(clauses), params
+
+    def count(self, owner, univ=None, faculty=None):
+        where, params = self._where(owner, univ, faculty)
+        with self._lock:
+            self._flush_locked()
+            return self._conn.execute(f"SELECT COUNT(*) FROM history WHERE {where}", params).fetchone()[0]
+
+    def page(self, owner, page=0, page_size=PAGE_SIZE, univ=None, faculty=None):
+        # 新しい順に 1 ページ分の HistoryRecord を返す
+        where, params = self._where(owner, univ, faculty)
+        with self._lock:
+            self._flush_locked()
+            rows = self._conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM history WHERE {where} "
+                "ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?",
+                params + [page_size, page * page_size],
+            ).fetchall()
+        return [HistoryRecord(*row) for row in rows]
+
+    def univs(self, owner):
+        with self._lock:
+            self._flush_locked()
+            rows = self._conn.execute(
+                "SELECT DISTINCT univ FROM history WHERE owner = ? ORDER BY univ", (owner,)
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    # ==========================================
+    # 全生徒の集計 (先生用ダッシュボード)
+    # ==========================================
+    def faculty_stats(self):
+        with self._lock:
+            self._flush_locked()
+            rows = self._conn.execute(
+                "SELECT univ, faculty, n, n_pass, center_sum, center_sumsq, center_min, center_max "
+                "FROM stats_faculty ORDER BY n DESC, univ, faculty"
+            ).fetchall()
+        return [FacultyStats(*row) for row in rows]
+
+    def center_histogram(self, univ, faculty):
+        # [(区間の下限, 件数), ...] (件数 0 の区間は含まない)
+        with self._lock:
+            self._flush_locked()
+            rows = self._conn.execute(
+                "SELECT bin, n FROM stats_center_hist WHERE univ = ? AND faculty = ? ORDER BY bin",
+                (univ, faculty),
+            ).fetchall()
+        return [(b * HIST_BIN_WIDTH, n) for b, n in rows]
+
+    def daily_counts(self, since=None):
+        # [(日付, 大学, 学部, 件数, 合格圏の件数), ...]  since: "YYYY-MM-DD" 以降のみ
+        with self._lock:
+            self._flush_locked()
+            rows = self._conn.execute(
+                "SELECT day, univ, faculty, n, n_pass FROM stats_daily WHERE day >= ? ORDER BY day",
+                (since or "",),
+            ).fetchall()
+        return rows
+
+    def close(self):
+        with self._lock:
+            self._flush_locked()
+            self._conn.close()
+        atexit.unregister(self.flush)
+
+
+def display_row(record):
+    # 画面表示用の整形 (保存時ではなく表示時に行う)
+    return {
+        "日時": record.created_at[:16],
+        "大学": record.univ,
+        "学部": record.faculty,
+        "共テ換算": f"{record.center_score:.1f}",
+        "二次目標": f"{record.secondary_total:.1f}点",
+        "合否": "合格圏" if record.gap >= 0 else f"不足 {abs(record.gap):.1f}",
+    }
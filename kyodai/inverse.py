@@ -0,0 +1,65 @@
+# ==========================================
+# 逆算: 目標点に届くための共通テストの最低ライン
+# ==========================================
+# 目標点 T と二次の見込み点 E から、共テ換算で必要な点は  C = T - E 。
+# 換算は学部ごとに線形 (Σ w_s x_s、0 <= x_s <= 満点 u_s) なので、全学部を次の 3 通りで一度に解く。
+#
+#   均等     全科目を同じ得点率 r で取る場合。Σ w_s u_s = 共テ満点 なので r = C / 共テ満点
+#   最少合計 素点の合計 Σ x_s が最小になる配分 (LP)。1 点あたりの換算が大きい科目から
+#            満点まで埋めていけば最適 (分数ナップサック) なので、重みの降順で累積和を取って求まる
+#   最低ライン 他の科目をすべて満点にしたとき、その科目で最低限必要な点
+#
+# 満点 u_s は文系・理系フォームの違い (地歴公民 200 / 100、理科 100 / 200) を含む。
+from dataclasses import dataclass
+
+import numpy as np
+
+from kyodai.engine import raw_caps
+
+
+@dataclass(frozen=True)
+class CenterRequirement:
+    needed: np.ndarray         # (M,) 共テ換算で必要な点 (0 未満は 0)
+    feasible: np.ndarray       # (M,) 共テ満点で届くか
+    uniform_ratio: np.ndarray  # (M,) 均等に取る場合の得点率 (届かなければ NaN)
+    uniform: np.ndarray        # (M, S) 均等に取る場合の各科目の素点
+    minimal: np.ndarray        # (M, S) 素点合計が最少になる配分
+    floor: np.ndarray          # (M, S) 他を満点にしたときの各科目の最低ライン
+
+
+def solve_center(table, target=None, secondary=0.0):
+    # target: (M,) 目標点 (省略時は各学部の pass_score_mean)
+    # secondary: (M,) またはスカラーの二次見込み点
+    if target is None:
+        target = table.pass_score_mean
+    needed = np.asarray(target, dtype=np.float64) - np.asarray(secondary, dtype=np.float64)
+    needed = np.maximum(np.broadcast_to(needed, table.center_max.shape), 0.0)
+    caps = raw_caps(table)
+    weights = table.weights
+    active = weights > 0
+    feasible = needed <= table.center_max + 1e-9
+
+    # 均等
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.where(table.center_max > 0, needed / table.center_max, 0.0)
+    ratio = np.where(feasible, ratio, np.nan)
+    uniform = np.where(active, np.minimum(ratio[:, None], 1.0) * caps, 0.0)
+
+    # 最少合計: 重みの大きい順に並べ替え、手前の科目を満点にした残りを次の科目で埋める
+    order = np.argsort(-weights, axis=1, kind="stable")
+    w_sorted = np.take_along_axis(weights, order, axis=1)
+    u_sorted = np.take_along_axis(caps, order, axis=1)
+    filled = np.cumsum(w_sorted * u_sorted, axis=1) - w_sorted * u_sorted
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x_sorted = np.where(w_sorted > 0, np.clip((needed[:, None] - filled) / w_sorted, 0.0, u_sorted), 0.0)
+    minimal = np.empty_like(x_sorted)
+    np.put_along_axis(minimal, order, x_sorted, axis=1)
+    minimal = np.where(feasible[:, None], minimal, np.nan)
+
+    # 最低ライン: 他の科目の満点分を引いた残り
+    rest = table.center_max[:, None] - weights * caps
+    with np.errstate(divide="ignore", invalid="ignore"):
+        floor = np.where(active, np.clip((needed[:, None] - rest) / weights, 0.0, caps), 0.0)
+    floor = np.where(feasible[:, None], floor, np.nan)
+
+    return CenterRequirement(needed, feasible, ratio, uniform, minimal, floor)
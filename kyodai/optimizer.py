@@ -0,0 +1,102 @@
+# ==========================================
+# 二次試験の最小コスト配分 (自動計算)
+# ==========================================
+# 各科目 k について
+#   現在の実力 a_k, 満点 m_k, 伸ばしにくさ c_k
+# を与え、1 点あたりの追加コストを  c_k * (1 + CURVATURE * s / m_k)
+# (得点 s が満点に近づくほど高くなる) とする。
+# 合計が required 以上になる配分のうち総コスト最小のものは、全科目の
+# 限界コストを λ でそろえる「水位合わせ」で求まるので、λ を二分探索する。
+# 入力は (学部数 F, 科目数 K) の配列で受け、全学部を一度に解く。
+from dataclasses import dataclass
+import numpy as np
+
+from kyodai.cache import memoize
+
+CURVATURE = 2.0
+_ITERATIONS = 60
+
+
+@dataclass(frozen=True)
+class Allocation:
+    scores: np.ndarray    # (F, K) 各科目の目標点
+    cost: np.ndarray      # (F,) 現在の実力からの追加コスト
+    total: np.ndarray     # (F,) 配分の合計点
+    feasible: np.ndarray  # (F,) 満点配分で required に届くか
+
+
+def _allocate(lam, ability, max_points, difficulty):
+    # 限界コストが λ になる得点 (科目ごとに [a_k, m_k] でクリップ)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        s = max_points * (lam[..., None] / difficulty - 1.0) / CURVATURE
+    s = np.clip(s, ability, max_points)
+    return np.where(max_points > 0, s, 0.0)
+
+
+def allocation_cost(scores, ability, max_points, difficulty):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        step = (scores - ability) + CURVATURE * (scores ** 2 - ability ** 2) / (2 * max_points)
+    return (difficulty * np.where(max_points > 0, step, 0.0)).sum(axis=-1)
+
+
+def _bounds(ability, max_points, difficulty):
+    active = max_points > 0
+    at_ability = np.where(active, difficulty * (1 + CURVATURE * ability / np.where(active, max_points, 1)), np.inf)
+    at_max = np.where(active, difficulty * (1 + CURVATURE), 0.0)
+    return at_ability.min(axis=-1), at_max.max(axis=-1)
+
+
+def optimize_allocation(required, ability, max_points, difficulty):
+    # required: (F,)  ability / max_points / difficulty: (F, K)  (満点 0 の列は科目なし)
+    required = np.atleast_1d(np.asarray(required, dtype=np.float64))
+    max_points = np.atleast_2d(np.asarray(max_points, dtype=np.float64))
+    ability = np.minimum(np.atleast_2d(np.asarray(ability, dtype=np.float64)), max_points)
+    difficulty = np.maximum(np.atleast_2d(np.asarray(difficulty, dtype=np.float64)), 1e-9)
+
+    lo, hi = _bounds(ability, max_points, difficulty)
+    lo = np.minimum(lo, hi)
+    for _ in range(_ITERATIONS):
+        mid = (lo + hi) / 2
+        enough = _allocate(mid, ability, max_points, difficulty).sum(axis=-1) >= required
+        hi = np.where(enough, mid, hi)
+        lo = np.where(enough, lo, mid)
+
+    # hi 側は常に required 以上 (届かない学部は満点配分になる)
+    scores = _allocate(hi, ability, max_points, difficulty)
+    # すでに現在の実力で届いている学部は追加なし
+    scores = np.where((ability.sum(axis=-1) >= required)[:, None], ability, scores)
+    return Allocation(
+        scores=scores,
+        cost=allocation_cost(scores, ability, max_points, difficulty),
+        total=scores.sum(axis=-1),
+        feasible=max_points.sum(axis=-1) >= required,
+    )
+
+
+def pareto_frontier(ability, max_points, difficulty, steps=41):
+    # 合計点 ↔ 最小コスト のトレードオフ曲線 (1 学部分)
+    # 現在の合計点から満点までを等間隔に区切り、各合計点を一括で解く
+    max_points = np.asarray(max_points, dtype=np.float64)
+    ability = np.minimum(np.asarray(ability, dtype=np.float64), max_points)
+    targets = np.linspace(ability.sum(), max_points.sum(), steps)
+    k = len(max_points)
+    result = optimize_allocation(
+        targets,
+        np.broadcast_to(ability, (steps, k)),
+        np.broadcast_to(max_points, (steps, k)),
+        np.broadcast_to(np.asarray(difficulty, dtype=np.float64), (steps, k)),
+    )
+    return result.total, result.cost, result.scores
+
+
+@memoize("optimizer", maxsize=1024)
+def best_allocation(required, ability, max_points, difficulty):
+    # 画面用の 1 学部版。引数はすべて tuple / float (キャッシュのキー)
+    result = optimize_allocation([required], [ability], [max_points], [difficulty])
+    return tuple(result.scores[0].tolist()), float(result.cost[0]), bool(result.feasible[0])
+
+
+@memoize("optimizer_frontier", maxsize=256)
+def frontier(ability, max_points, difficulty):
+    totals, costs, scores = pareto_frontier(ability, max_points, difficulty)
+    return tuple(totals.tolist()), tuple(costs.tolist()), tuple(map(tuple, scores.tolist()))
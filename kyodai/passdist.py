@@ -0,0 +1,155 @@
+# ==========================================
+# 過去の合格者得点分布 (パーセンタイル・順位帯の逆引き)
+# ==========================================
+# 学部データの任意項目 pass_history に年度ごとの合格者 最低点 / 平均点 / 最高点 と
+# 得点帯ごとの人数 (bands: [[下限, 上限, 人数], ...]) を持たせる。
+#
+# 読み込み時に全学部分を「得点 → 累積割合」の折れ線 (点列) にまとめ、1 本の昇順配列に
+# 連結しておく。学部 m の点は m * _SPAN だけずらして並べるので、全学部の総合点を
+# np.searchsorted 1 回 (各 O(log n)) で引ける。ランキングのように全学部を一度に
+# 表示する画面でもそのまま使える。
+#   - bands がある年度: 各帯の中では一様に分布するとみなし、全年度の人数を合算
+#   - bands がない (または人数の合計が 0 の) 学部: min / mean / max があれば (min, 0) (mean, 0.5) (max, 1) の折れ線で近似
+#   - どちらもない学部: パーセンタイルは NaN (has_data も False)
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+
+from kyodai.data import DEFAULT_YEAR, load_data
+
+# 学部ごとに得点をずらす幅 (総合点の満点より十分大きければよい)
+_SPAN = 1e5
+
+# パーセンタイルの区切りと順位帯の名前 (合格者の中での位置)
+RANK_EDGES = np.array([0.25, 0.5, 0.75, 0.9])
+RANK_LABELS = ("下位 25%", "中位 (下半分)", "中位 (上半分)", "上位 25%", "上位 10%")
+BELOW_MIN = "合格最低点未満"
+ABOVE_MAX = "合格者最高点以上"
+
+
+@dataclass(frozen=True)
+class PassDistribution:
+    keys: tuple            # ((大学, 学部), ...) FacultyTable.keys と同じ順
+    history: tuple         # 学部ごとの pass_history (年度順のタプル)
+    pass_min: np.ndarray   # (M,) 全年度の最低点 (なければ NaN)
+    pass_mean: np.ndarray  # (M,) 年度ごとの平均点の平均
+    pass_max: np.ndarray   # (M,) 全年度の最高点
+    estimated: np.ndarray  # (M,) bool  bands がなく min / mean / max から近似した学部
+    points: np.ndarray     # 連結した折れ線の x (m * _SPAN + 得点)、昇順
+    cdf: np.ndarray        # 各点での累積割合 (0〜1)
+    start: np.ndarray      # (M,) 学部 m の点は points[start[m]:stop[m]]
+    stop: np.ndarray
+
+    def percentile(self, totals, idx=None):
+        # 総合点が合格者の何割以上か (0〜1)。totals は idx (省略時は全学部) と同じ長さ
+        idx = np.arange(len(self.keys)) if idx is None else np.asarray(idx)
+        totals = np.broadcast_to(np.asarray(totals, dtype=np.float64), idx.shape)
+        start, stop = self.start[idx], self.stop[idx]
+        has = stop > start
+        if not self.points.size:
+            return np.full(idx.shape, np.nan)
+
+        q = idx * _SPAN + totals
+        pos = np.searchsorted(self.points, q, side="right")
+        # データのない学部も配列外を指さないように丸めておき、最後に NaN にする
+        last = np.minimum(np.maximum(stop - 1, start), self.points.size - 1)
+        lo = np.clip(pos - 1, np.minimum(start, last), last)
+        hi = np.clip(pos, np.minimum(start, last), last)
+        x0, x1 = self.points[lo], self.points[hi]
+        width = x1 - x0
+        frac = np.divide(q - x0, width, out=np.ones_like(q), where=width > 0)
+        pct = self.cdf[lo] + np.clip(frac, 0.0, 1.0) * (self.cdf[hi] - self.cdf[lo])
+        return np.where(has, pct, np.nan)
+
+    def rank_band(self, totals, idx=None):
+        # 順位帯の名前。データのない学部は None
+        idx = np.arange(len(self.keys)) if idx is None else np.asarray(idx)
+        totals = np.broadcast_to(np.asarray(totals, dtype=np.float64), idx.shape)
+        pct = self.percentile(totals, idx)
+        band = np.searchsorted(RANK_EDGES, np.nan_to_num(pct), side="right")
+        labels = []
+        for p, b, t, lo, hi in zip(pct, band, totals, self.pass_min[idx], self.pass_max[idx]):
+            if np.isnan(p):
+                labels.append(None)
+            elif t < lo:
+                labels.append(BELOW_MIN)
+            elif t >= hi:
+                labels.append(ABOVE_MAX)
+            else:
+                labels.append(RANK_LABELS[b])
+        return labels
+
+    def has_data(self, idx):
+        return bool(self.stop[idx] > self.start[idx])
+
+
+def _band_curve(years):
+    # 全年度の得点帯を合算した累積分布。帯の境界を点とし、帯の中は一様とみなす
+    # 人数の合計が 0 なら分布にならないので None
+    bands = np.array([b for y in years for b in y.get("bands", ())], dtype=np.float64).reshape(-1, 3)
+    lo, hi, count = bands.T
+    if not bands.size or count.sum() <= 0:
+        return None
+    xs = np.unique(np.concatenate([lo, hi]))
+    width = np.where(hi > lo, hi - lo, 1.0)
+    filled = np.clip((xs[:, None] - lo) / width, 0.0, 1.0) * count
+    cum = filled.sum(axis=1)
+    return xs, cum / cum[-1]
+
+
+def build_distribution(data, keys):
+    history, pmin, pmean, pmax, estimated = [], [], [], [], []
+    curves = []
+    for univ, faculty in keys:
+        years = tuple(sorted(data[univ][faculty].get("pass_history", ()), key=lambda y: y["year"]))
+        history.append(years)
+        mins = [y["min"] for y in years if "min" in y]
+        means = [y["mean"] for y in years if "mean" in y]
+        maxs = [y["max"] for y in years if "max" in y]
+        lo = min(mins) if mins else np.nan
+        mean = float(np.mean(means)) if means else np.nan
+        hi = max(maxs) if maxs else np.nan
+
+        curve = _band_curve(years)
+        if curve is not None:
+            xs, cdf = curve
+            lo = xs[0] if np.isnan(lo) else lo
+            hi = xs[-1] if np.isnan(hi) else hi
+            estimated.append(False)
+        elif not np.isnan([lo, mean, hi]).any():
+            xs, cdf = np.array([lo, mean, hi]), np.array([0.0, 0.5, 1.0])
+            estimated.append(True)
+        else:
+            xs, cdf = np.empty(0), np.empty(0)
+            estimated.append(False)
+        curves.append((xs, cdf))
+        pmin.append(lo)
+        pmean.append(mean)
+        pmax.append(hi)
+
+    sizes = np.array([len(xs) for xs, _ in curves], dtype=np.int64)
+    stop = np.cumsum(sizes)
+    start = stop - sizes
+    points = np.concatenate([m * _SPAN + xs for m, (xs, _) in enumerate(curves)] or [np.empty(0)])
+    cdf = np.concatenate([c for _, c in curves] or [np.empty(0)])
+    return PassDistribution(
+        keys=tuple(keys),
+        history=tuple(history),
+        pass_min=np.array(pmin, dtype=np.float64),
+        pass_mean=np.array(pmean, dtype=np.float64),
+        pass_max=np.array(pmax, dtype=np.float64),
+        estimated=np.array(estimated, dtype=bool),
+        points=points,
+        cdf=cdf,
+        start=start,
+        stop=stop,
+    )
+
+
+@lru_cache(maxsize=None)
+def get_distribution(year=DEFAULT_YEAR):
+    # プロセスで 1 回だけ組み立て、全セッションで共有する
+    from kyodai.engine import get_table
+
+    return build_distribution(load_data(year), get_table(year).keys)
@@ -0,0 +1,237 @@
+# ==========================================
+# 再実行ごとの区間計測 (デバッグ用)
+# ==========================================
+# app.py の各セクションを名前付きの区間 (span) で囲み、再実行 1 回ごとの所要時間を記録する。
+# 有効になるのは 環境変数 KYODAI_PROFILE=1 のときか、URL に ?debug=1 を付けて管理者として
+# 認証したとき (ui.require_admin と同じトークン。未設定なら URL では有効にできない) だけ。
+# サイドバーには全セッションの計測が出て、サーバーに JSON も書き出せるため。
+# 無効時は何もしない共有オブジェクトを返すので、計測のコストはほぼゼロ。
+#
+# 使い方 (app.py):
+#   debug_login(); prof = get_profiler(); prof.begin()
+#   prof.section("form") ... prof.section("calculation") ... prof.end()
+#   fragment 関数には @timed("名前") を付ける
+#
+# 記録先:
+#   - セッションごと: 直近 HISTORY_SIZE 回分の再実行 (サイドバーに表示)
+#   - プロセス全体: 区間ごとの所要時間 (直近 SAMPLE_SIZE 件) → p50 / p95 / p99 を JSON に書き出し
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from functools import wraps
+from pathlib import Path
+
+import numpy as np
+import streamlit as st
+
+from kyodai.ui import admin_login, is_admin
+
+HISTORY_SIZE = 20
+SAMPLE_SIZE = 5000
+_SESSION_KEY = "_kyodai_profiler"
+
+
+class _Aggregate:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples = {}
+        self.sessions = 0
+        self.reruns = 0
+
+    def add(self, record):
+        with self._lock:
+            self.reruns += 1
+            for name, ms in record["spans"].items():
+                self._samples.setdefault(name, deque(maxlen=SAMPLE_SIZE)).append(ms)
+
+    def add_session(self):
+        with self._lock:
+            self.sessions += 1
+
+    def summary(self):
+        with self._lock:
+            samples = {name: np.array(values) for name, values in self._samples.items()}
+            sessions, reruns = self.sessions, self.reruns
+        spans = {}
+        for name, values in samples.items():
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            spans[name] = {
+                "count": int(len(values)),
+                "mean_ms": float(values.mean()),
+                "p50_ms": float(p50),
+                "p95_ms": float(p95),
+                "p99_ms": float(p99),
+            }
+        return {"sessions": sessions, "reruns": reruns, "spans": spans}
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self.sessions = self.reruns = 0
+
+
+AGGREGATE = _Aggregate()
+
+
+class _NullProfiler:
+    enabled = False
+
+    def begin(self):
+        pass
+
+    def end(self):
+        pass
+
+    def section(self, name):
+        pass
+
+    def span(self, name):
+        return nullcontext()
+
+
+NULL_PROFILER = _NullProfiler()
+
+
+class SessionProfiler:
+    enabled = True
+
+    def __init__(self):
+        self.reruns = 0
+        self.history = deque(maxlen=HISTORY_SIZE)
+        self._current = None
+        self._section = None
+        AGGREGATE.add_session()
+
+    def begin(self, kind="app"):
+        # 前回が st.stop() などで閉じられていなければここで確定させる
+        if self._current is not None:
+            self.end()
+        self.reruns += 1
+        self._current = {"kind": kind, "started": time.perf_counter(), "spans": {}}
+        self._section = None
+
+    def section(self, name):
+        # 平たいスクリプト用の区切り。前の section を閉じて name の計測を始める
+        now = time.perf_counter()
+        self._close_section(now)
+        if self._current is not None:
+            self._section = (name, now)
+
+    def _close_section(self, now):
+        if self._section is not None and self._current is not None:
+            name, start = self._section
+            spans = self._current["spans"]
+            spans[name] = spans.get(name, 0.0) + (now - start) * 1000
+        self._section = None
+
+    def end(self):
+        self._close_section(time.perf_counter())
+        record, self._current = self._current, None
+        if record is None:
+            return
+        record["spans"]["total"] = (time.perf_counter() - record.pop("started")) * 1000
+        record["at"] = datetime.now().strftime("%H:%M:%S")
+        self.history.append(record)
+        AGGREGATE.add(record)
+
+    @contextmanager
+    def span(self, name):
+        # 全体実行中でなければ (= fragment だけの再実行) 独立した記録として扱う
+        standalone = self._current is None
+        if standalone:
+            self.begin(kind=f"fragment:{name}")
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if self._current is not None:
+                spans = self._current["spans"]
+                spans[name] = spans.get(name, 0.0) + (time.perf_counter() - start) * 1000
+            if standalone:
+                self.end()
+
+
+def is_enabled():
+    if os.environ.get("KYODAI_PROFILE") == "1":
+        return True
+    return st.query_params.get("debug") == "1" and is_admin()
+
+
+def debug_login():
+    # ?debug=1 のときだけサイドバーにトークン入力欄を出す。1 回の実行につき 1 度だけ呼ぶこと
+    token = os.environ.get("KYODAI_ADMIN_TOKEN")
+    if (os.environ.get("KYODAI_PROFILE") == "1" or not token
+            or st.query_params.get("debug") != "1" or is_admin()):
+        return
+    admin_login(st.sidebar.text_input("管理者トークン (計測)", type="password", key="_profile_token"))
+
+
+def get_profiler():
+    if not is_enabled():
+        return NULL_PROFILER
+    prof = st.session_state.get(_SESSION_KEY)
+    if prof is None:
+        prof = st.session_state[_SESSION_KEY] = SessionProfiler()
+    return prof
+
+
+def timed(name):
+    # fragment 関数用。全体実行中は 1 区間、fragment 単独の再実行時は 1 回分の記録になる
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            prof = get_profiler()
+            if not prof.enabled:
+                return fn(*args, **kwargs)
+            with prof.span(name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def default_export_path():
+    base = Path(os.environ.get("KYODAI_DATA_DIR", Path.home() / ".local" / "share" / "kyodai"))
+    return base / "profile.json"
+
+
+def export(path=None):
+    path = Path(path or default_export_path())
+    path.parent.mkdir(parents=True, exist_ok=True)
+    report = {"exported_at": datetime.now().isoformat(timespec="seconds"), **AGGREGATE.summary()}
+    path.write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    return path
+
+
+def render_sidebar(prof):
+    # デバッグ用サイドバー (計測が有効なときだけ)
+    if not prof.enabled:
+        return
+    import pandas as pd
+
+    with st.sidebar:
+        st.subheader("⏱ 計測")
+        st.caption(f"このセッションの再実行: {prof.reruns} 回")
+        if prof.history:
+            rows = [{"時刻": r["at"], "種別": r["kind"], **{k: round(v, 1) for k, v in r["spans"].items()}}
+                    for r in reversed(prof.history)]
+            st.dataframe(pd.DataFrame(rows), hide_index=True)
+
+        summary = AGGREGATE.summary()
+        st.caption(f"プロセス全体: {summary['sessions']} セッション / {summary['reruns']} 回")
+        if summary["spans"]:
+            st.dataframe(
+                pd.DataFrame([
+                    {"区間": name, "件数": s["count"], "p50": round(s["p50_ms"], 1),
+                     "p95": round(s["p95_ms"], 1), "p99": round(s["p99_ms"], 1)}
+                    for name, s in summary["spans"].items()
+                ]),
+                hide_index=True,
+            )
+        if st.button("集計を書き出す", key="_profile_export"):
+            st.success(f"{export()} に書き出しました")
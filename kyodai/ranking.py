@@ -0,0 +1,43 @@
+# ==========================================
+# 逆引きモード: 全学部を二次の余裕でランキング
+# ==========================================
+import numpy as np
+import pandas as pd
+
+
+def rank_faculties(table, raw, is_science=None, univs=None, max_required_ratio=None,
+                   pass_dist=None, secondary_ratio=None):
+    # raw: 共テ素点ベクトル (S,)
+    # is_science: True/False で文系・理系フォームの学部に絞り込み (None なら全学部)
+    # univs: 対象大学名のリスト (None なら全大学)
+    # max_required_ratio: 二次必要得点率 (必要点 / 二次満点) の上限
+    # pass_dist / secondary_ratio: 指定すると 二次を満点の secondary_ratio 取ったときの
+    #   総合点が過去の合格者の何 % 以上かと順位帯の列を加える (データのない学部は空欄)
+    center = table.score(raw)
+    required = table.pass_score_mean - center
+    ratio = required / table.secondary_max
+
+    mask = np.ones(len(table), dtype=bool)
+    if is_science is not None:
+        mask &= table.is_science == is_science
+    if univs is not None:
+        codes = [table.univs.index(u) for u in univs]
+        mask &= np.isin(table.univ_code, codes)
+    if max_required_ratio is not None:
+        mask &= ratio <= max_required_ratio
+
+    idx = np.flatnonzero(mask)
+    idx = idx[np.argsort(ratio[idx], kind="stable")]
+    df = pd.DataFrame({
+        "大学": [table.keys[i][0] for i in idx],
+        "学部": [table.keys[i][1] for i in idx],
+        "共テ換算": np.round(center[idx], 1),
+        "二次必要点": np.round(np.maximum(required[idx], 0.0), 1),
+        "二次満点": table.secondary_max[idx],
+        "必要得点率": np.round(np.clip(ratio[idx], 0.0, None) * 100, 1),
+    })
+    if pass_dist is not None and secondary_ratio is not None:
+        totals = center[idx] + table.secondary_max[idx] * secondary_ratio
+        df["合格者内の位置"] = np.round(pass_dist.percentile(totals, idx) * 100, 1)
+        df["順位帯"] = pass_dist.rank_band(totals, idx)
+    return df
@@ -0,0 +1,313 @@
+# ==========================================
+# 判定シートの一括作成 (生徒 1 人 = 1 ファイル)
+# ==========================================
+# 模試結果ファイル (列: 生徒ID + track (文系 / 理系) + 共テ素点 8 列、任意で secondary_ratio) を
+# チャンク単位で読み、生徒ごとに志望学部それぞれの「判定結果」(共テ換算得点・情報の換算点・
+# 二次試験必要点) と二次試験の配分 (画面の初期値と同じ 満点 × 得点率 の切り捨て) に対する過不足を書き出す。
+# 素点の検証と区分の扱いは cohort.read_raw と同じで、シートには生徒と同じ区分の学部だけを載せる。
+#
+#   形式: html (標準ライブラリのみ) / xlsx (openpyxl, 学部ごとにシート) / pdf (reportlab)
+#   検証: 書き出しを始める前にファイル全体を 1 度読み、素点・区分・生徒 ID (重複や、別の ID が
+#         同じファイル名になるもの) を確認する。1 行でも不正なら 1 枚も作らずに止める
+#   並列: チャンクごとにワーカープロセスで計算・書き出しし、先読みは workers * 2 チャンクまで (cohort.map_chunks)
+#   再開: 書き終えたチャンクの生徒 ID を出力先の _completed.txt に追記し、
+#         次回はそこにある生徒を読み飛ばす (中断したチャンクは最初から作り直す)
+import html
+import os
+import re
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from kyodai.cohort import TRACK_COLUMN, TRACKS, map_chunks, read_chunks, read_raw, select_faculties
+from kyodai.data import DEFAULT_YEAR
+from kyodai.engine import COL, get_table
+
+FORMATS = ("html", "xlsx", "pdf")
+DEFAULT_CHUNK_SIZE = 500
+DEFAULT_SECONDARY_RATIO = 0.6   # 画面の二次配分シミュレーションの初期値と同じ
+MANIFEST_NAME = "_completed.txt"
+
+
+def _safe_name(student_id):
+    # ファイル名に使えない文字を置き換える
+    return re.sub(r'[\\/:*?"<>|\s]+', "_", str(student_id)).strip("._") or "_"
+
+
+def faculty_metrics(table, faculty_idx, raw, secondary_ratio):
+    # raw: (N, S) 素点、secondary_ratio: (N,) 二次の想定得点率
+    # 返り値は (N, F) の配列と、(N, F, K) の二次配分
+    weights = table.weights[faculty_idx]
+    center = raw @ weights.T
+    info = raw[:, COL["info"], None] * weights[:, COL["info"]]
+    required = table.pass_score_mean[faculty_idx] - center
+    allocation = np.floor(table.secondary_points[faculty_idx] * secondary_ratio[:, None, None])
+    gap = allocation.sum(axis=2) - required
+    return center, info, required, allocation, gap
+
+
+def check_tracks(table, faculty_idx, chunk, is_science):
+    # 対象学部に自分の区分の学部が 1 つもない生徒がいれば ValueError (空のシートは作らない)
+    covered = set(table.is_science[faculty_idx].tolist())
+    orphan = ~np.isin(is_science, list(covered))
+    if orphan.any():
+        rows = [str(i + 1) for i in chunk.index[orphan][:10]]
+        more = f" ほか {int(orphan.sum()) - len(rows)} 行" if orphan.sum() > len(rows) else ""
+        names = " / ".join(t for t, sci in TRACKS.items() if sci not in covered)
+        raise ValueError(
+            f"対象の学部に {names} の学部がありません (データ {', '.join(rows)} 行目{more})。"
+            f"--univ / --faculty を見直すか、{TRACK_COLUMN} ごとにファイルを分けてください"
+        )
+
+
+def _verdict_text(required, secondary_max):
+    if required <= 0:
+        return f"共通テストのみで目標点を超えています (+{abs(required):.1f})"
+    if required > secondary_max:
+        return f"二次試験で満点を取っても届きません (残り {required:.1f}点)"
+    return f"目標達成まで、二次試験であと {required:.1f} 点 / {secondary_max:g}点"
+
+
+def build_sheets(table, faculty_idx, chunk, id_column):
+    # チャンク内の生徒ごとに、同じ区分の学部ごとの判定シート (辞書) のリストを作る
+    if id_column not in chunk.columns:
+        raise ValueError(f"入力ファイルに生徒 ID の列 {id_column} がありません")
+    raw, is_science = read_raw(chunk)
+    check_tracks(table, faculty_idx, chunk, is_science)
+    if "secondary_ratio" in chunk.columns:
+        ratio = chunk["secondary_ratio"].to_numpy(dtype=np.float64, na_value=DEFAULT_SECONDARY_RATIO)
+    else:
+        ratio = np.full(len(chunk), DEFAULT_SECONDARY_RATIO)
+    center, info, required, allocation, gap = faculty_metrics(table, faculty_idx, raw, np.clip(ratio, 0.0, 1.0))
+
+    students = []
+    for n, student_id in enumerate(chunk[id_column].tolist()):
+        sheets = []
+        for j, i in enumerate(faculty_idx):
+            if table.is_science[i] != is_science[n]:
+                continue
+            univ, faculty = table.keys[i]
+            names = table.secondary_names[i]
+            sheets.append({
+                "大学": univ,
+                "学部": faculty,
+                "共テ換算得点": round(float(center[n, j]), 2),
+                "共テ満点": float(table.center_max[i]),
+                "情報の換算点": round(float(info[n, j]), 1),
+                "二次試験必要点": round(max(0.0, float(required[n, j])), 1),
+                "二次満点": float(table.secondary_max[i]),
+                "判定": _verdict_text(float(required[n, j]), float(table.secondary_max[i])),
+                "二次配分": [
+                    (name, float(allocation[n, j, k]), float(table.secondary_points[i, k]))
+                    for k, name in enumerate(names)
+                ],
+                "配分合計": float(allocation[n, j, :len(names)].sum()),
+                "過不足": round(float(gap[n, j]), 1),
+            })
+        students.append((str(student_id), sheets))
+    return students
+
+
+# ==========================================
+# 各形式の書き出し
+# ==========================================
+_SUMMARY_COLUMNS = ("大学", "学部", "共テ換算得点", "情報の換算点", "二次試験必要点", "配分合計", "過不足")
+
+
+def _summary_frame(sheets):
+    return pd.DataFrame([{k: s[k] for k in _SUMMARY_COLUMNS} for s in sheets])
+
+
+def render_html(student_id, sheets):
+    e = html.escape
+    parts = [
+        "<!DOCTYPE html><html lang='ja'><head><meta charset='utf-8'>",
+        f"<title>判定シート {e(student_id)}</title>",
+        "<style>body{font-family:sans-serif;margin:2em}table{border-collapse:collapse;margin:.5em 0 1.5em}"
+        "th,td{border:1px solid #ccc;padding:.3em .6em;text-align:right}th{background:#f3f3f3}"
+        "td:first-child,th:first-child{text-align:left}.ng{color:#c00}</style></head><body>",
+        f"<h1>判定シート: {e(student_id)}</h1>",
+        _summary_frame(sheets).to_html(index=False, border=0, float_format=lambda v: f"{v:.1f}"),
+    ]
+    for s in sheets:
+        parts.append(f"<h2>{e(s['大学'])} / {e(s['学部'])}</h2>")
+        parts.append("<table><tr><th>共テ換算得点</th><th>情報の換算点</th><th>二次試験必要点</th></tr>")
+        parts.append(
+            f"<tr><td>{s['共テ換算得点']:.2f} / {s['共テ満点']:g}</td><td>{s['情報の換算点']:.1f}</td>"
+            f"<td>{s['二次試験必要点']:.1f}</td></tr></table>"
+        )
+        parts.append(f"<p>{e(s['判定'])}</p>")
+        parts.append("<table><tr><th>二次科目</th><th>配分</th><th>満点</th></tr>")
+        for name, pt, top in s["二次配分"]:
+            parts.append(f"<tr><td>{e(name)}</td><td>{pt:g}</td><td>{top:g}</td></tr>")
+        cls = "" if s["過不足"] >= 0 else " class='ng'"
+        parts.append(f"<tr><th>合計</th><th>{s['配分合計']:g}</th><th{cls}>過不足 {s['過不足']:+.1f}</th></tr></table>")
+    parts.append("</body></html>")
+    return "\n".join(parts).encode("utf-8")
+
+
+def _sheet_title(n, faculty):
+    # Excel のシート名は 31 文字まで、一部の記号は使えない
+    return re.sub(r"[\[\]:*?/\\]", "_", f"{n}_{faculty}")[:31]
+
+
+# 形式ごとに必要な追加パッケージ (requirements.txt には含めない)
+_FORMAT_DEPENDENCIES = {"xlsx": "openpyxl", "pdf": "reportlab"}
+
+
+def check_format(fmt):
+    if fmt not in FORMATS:
+        raise ValueError(f"出力形式は {', '.join(FORMATS)} のいずれかにしてください ({fmt})")
+    module = _FORMAT_DEPENDENCIES.get(fmt)
+    if module is not None:
+        try:
+            __import__(module)
+        except ImportError:
+            raise ValueError(f"{fmt} 形式には {module} が必要です (pip install {module})") from None
+
+
+def render_xlsx(student_id, sheets, path):
+    with pd.ExcelWriter(path, engine="openpyxl") as writer:
+        _summary_frame(sheets).to_excel(writer, sheet_name="概要", index=False)
+        for n, s in enumerate(sheets, 1):
+            rows = [
+                ("大学", s["大学"]), ("学部", s["学部"]),
+                ("共テ換算得点", s["共テ換算得点"]), ("共テ満点", s["共テ満点"]),
+                ("情報の換算点", s["情報の換算点"]), ("二次試験必要点", s["二次試験必要点"]),
+                ("判定", s["判定"]), ("", ""),
+            ]
+            rows += [(f"二次: {name} (/{top:g})", pt) for name, pt, top in s["二次配分"]]
+            rows += [("配分合計", s["配分合計"]), ("過不足", s["過不足"])]
+            pd.DataFrame(rows, columns=["項目", "値"]).to_excel(
+                writer, sheet_name=_sheet_title(n, s["学部"]), index=False
+            )
+
+
+def render_pdf(student_id, sheets, path):
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table
+
+    font = "HeiseiKakuGo-W5"
+    pdfmetrics.registerFont(UnicodeCIDFont(font))
+    styles = getSampleStyleSheet()
+    for name in ("Title", "Heading2", "Normal"):
+        styles[name].fontName = font
+
+    story = [Paragraph(f"判定シート: {html.escape(student_id)}", styles["Title"])]
+    for s in sheets:
+        story.append(Paragraph(f"{html.escape(s['大学'])} / {html.escape(s['学部'])}", styles["Heading2"]))
+        rows = [
+            ["共テ換算得点", f"{s['共テ換算得点']:.2f} / {s['共テ満点']:g}"],
+            ["情報の換算点", f"{s['情報の換算点']:.1f}"],
+            ["二次試験必要点", f"{s['二次試験必要点']:.1f}"],
+        ]
+        rows += [[f"二次: {name}", f"{pt:g} / {top:g}"] for name, pt, top in s["二次配分"]]
+        rows += [["配分合計", f"{s['配分合計']:g}"], ["過不足", f"{s['過不足']:+.1f}"]]
+        story.append(Table(rows, style=[("FONTNAME", (0, 0), (-1, -1), font)]))
+        story.append(Paragraph(html.escape(s["判定"]), styles["Normal"]))
+        story.append(Spacer(1, 12))
+    SimpleDocTemplate(str(path), pagesize=A4).build(story)
+
+
+def _write_atomic(path, render):
+    # 途中で止まっても中途半端なファイルが残らないよう、一時ファイルに書いてから置き換える
+    tmp = path.with_name(f".{path.name}.tmp")
+    render(tmp)
+    os.replace(tmp, path)
+
+
+def render_chunk(chunk, faculty_idx, out_dir, fmt, id_column, year=DEFAULT_YEAR):
+    # ProcessPool のワーカーから呼ばれる。書き終えた生徒 ID のリストを返す
+    table = get_table(year)
+    out_dir = Path(out_dir)
+    done = []
+    for student_id, sheets in build_sheets(table, faculty_idx, chunk, id_column):
+        path = out_dir / f"{_safe_name(student_id)}.{fmt}"
+        if fmt == "html":
+            body = render_html(student_id, sheets)
+            _write_atomic(path, lambda p: p.write_bytes(body))
+        elif fmt == "xlsx":
+            _write_atomic(path, lambda p: render_xlsx(student_id, sheets, p))
+        else:
+            _write_atomic(path, lambda p: render_pdf(student_id, sheets, p))
+        done.append(student_id)
+    return done
+
+
+# ==========================================
+# 実行 (チャンクの先読み・進捗・再開)
+# ==========================================
+def check_input(src, chunk_size, table, faculty_idx, id_column):
+    # ファイル全体を検証して行数を返す。生徒 ID の重複と、別の ID が同じファイル名になる
+    # (大文字小文字だけが違う場合を含む) ときも、上書きを避けるため ValueError
+    seen = {}
+    total = 0
+    for chunk in read_chunks(src, chunk_size):
+        if id_column not in chunk.columns:
+            raise ValueError(f"入力ファイルに生徒 ID の列 {id_column} がありません")
+        _, is_science = read_raw(chunk)
+        check_tracks(table, faculty_idx, chunk, is_science)
+        for row, student_id in zip(chunk.index, chunk[id_column].astype(str)):
+            key = _safe_name(student_id).casefold()
+            if key in seen:
+                first_id, first_row = seen[key]
+                what = f"生徒 ID {student_id} が重複しています" if first_id == student_id else (
+                    f"生徒 ID {first_id} と {student_id} が同じファイル名 ({_safe_name(student_id)}) になります"
+                )
+                raise ValueError(f"{what} (データ {first_row + 1}, {row + 1} 行目)")
+            seen[key] = (student_id, row)
+        total += len(chunk)
+    return total
+
+
+def _read_manifest(path):
+    if not path.exists():
+        return set()
+    with open(path, encoding="utf-8") as f:
+        return {line.rstrip("\n") for line in f if line.strip()}
+
+
+def generate_reports(src, out_dir, fmt="html", univ=None, faculty=None, id_column="student_id",
+                     chunk_size=DEFAULT_CHUNK_SIZE, workers=1, year=DEFAULT_YEAR, resume=True, progress=None):
+    # progress(済み件数, 全件数) を各チャンクの完了時に呼ぶ。返り値は (今回作成した件数, 読み飛ばした件数)
+    check_format(fmt)
+    table = get_table(year)
+    faculty_idx = select_faculties(table, univ, faculty)
+    total = check_input(src, chunk_size, table, faculty_idx, id_column)
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = out_dir / MANIFEST_NAME
+    if not resume and manifest_path.exists():
+        manifest_path.unlink()
+    completed = _read_manifest(manifest_path)
+
+    written = skipped = 0
+
+    def pending_chunks():
+        nonlocal skipped
+        for chunk in read_chunks(src, chunk_size):
+            if completed:
+                keep = ~chunk[id_column].astype(str).isin(completed)
+                skipped += int((~keep).sum())
+                chunk = chunk[keep]
+            if len(chunk):
+                yield chunk
+
+    with open(manifest_path, "a", encoding="utf-8") as manifest:
+        def finish(ids):
+            nonlocal written
+            manifest.write("".join(f"{i}\n" for i in ids))
+            manifest.flush()
+            written += len(ids)
+            if progress is not None:
+                progress(written + skipped, total)
+
+        for ids in map_chunks(render_chunk, pending_chunks(), workers, faculty_idx, out_dir, fmt, id_column, year):
+            finish(ids)
+    if progress is not None:
+        progress(written + skipped, total)
+    return written, skipped
@@ -0,0 +1,65 @@
+# ==========================================
+# 感度分析: どの科目の 1 点が一番効くか
+# ==========================================
+# 共テの換算は学部ごとに線形なので、素点 1 点あたりの換算点の増分は重み行列そのもの。
+# 「科目 s を +k 点」したときの増分は、満点までの残り (headroom) で頭打ちにして
+#   gain[m, s, k] = weight[m, s] * min(k, headroom[m, s])
+# を (学部 M × 科目 S × k の候補) のテンソルとして一度に計算する。
+# 二次試験の点は換算せずそのまま足されるので、1 点あたりの増分は 1 (満点まで)。
+import numpy as np
+import pandas as pd
+
+from kyodai.cache import get_cache
+from kyodai.engine import CENTER_COLUMNS, CENTER_LABELS, raw_caps
+
+
+def sweep_tensors(table, raw, ks, secondary_ratio):
+    # 返り値:
+    #   center:    (M, S, len(ks)) 共テ科目を +k 点したときの換算点の増分
+    #   secondary: (M, K, len(ks)) 二次科目を +k 点したときの総合点の増分
+    raw = np.asarray(raw, dtype=np.float64)
+    ks = np.asarray(ks, dtype=np.float64)
+    headroom = np.clip(raw_caps(table) - raw, 0.0, None)
+    center = table.weights[:, :, None] * np.minimum(ks, headroom[:, :, None])
+
+    # 二次は各科目とも満点の secondary_ratio まで取れている前提で、残りが伸びしろ
+    sec_headroom = table.secondary_points * (1.0 - secondary_ratio)
+    secondary = np.minimum(ks, sec_headroom[:, :, None])
+    return center, secondary
+
+
+_sweep_cache = get_cache("sensitivity", maxsize=512)
+
+
+def sweep(table, raw, ks, secondary_ratio=0.6):
+    # (データ版, 素点, k の候補, 二次得点率) をキーに全セッションで共有する
+    raw_key = tuple(round(float(v), 1) for v in raw)
+    ks = tuple(int(k) for k in ks)
+    secondary_ratio = round(float(secondary_ratio), 2)
+    key = (table.version, raw_key, ks, secondary_ratio)
+    return _sweep_cache.get_or_compute(key, lambda: sweep_tensors(table, raw_key, ks, secondary_ratio))
+
+
+def per_point_frame(table, faculty_idx):
+    # 学部 × 科目 の「1 点あたりの増分」表 (二次は「二次:科目名」列)
+    rows = []
+    for i in faculty_idx:
+        row = {"大学": table.keys[i][0], "学部": table.keys[i][1]}
+        for j, col in enumerate(CENTER_COLUMNS):
+            row[CENTER_LABELS[col]] = float(table.weights[i, j])
+        for name in table.secondary_names[i]:
+            row[f"二次:{name}"] = 1.0
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def gain_long_frame(table, faculty_idx, center, secondary, k_index):
+    # ヒートマップ用の縦持ち (学部, 科目, 増分)。二次は学部ごとに科目名が違うので名前で並べる
+    rows = []
+    for i in faculty_idx:
+        label = f"{table.keys[i][0]} / {table.keys[i][1]}"
+        for j, col in enumerate(CENTER_COLUMNS):
+            rows.append((label, CENTER_LABELS[col], float(center[i, j, k_index])))
+        for j, name in enumerate(table.secondary_names[i]):
+            rows.append((label, f"二次:{name}", float(secondary[i, j, k_index])))
+    return pd.DataFrame(rows, columns=["学部", "科目", "増分"])
@@ -0,0 +1,136 @@
+# ==========================================
+# 入試データのコンパイル済みスナップショット
+# ==========================================
+# 年度ごとの JSON を検証・配列化した FacultyTable を 1 ファイルのバイナリに書き出し、
+# 以降は np.memmap で読み込む (JSON の解析も辞書の再構築もしない)。
+#
+# ファイル形式:
+#   MAGIC (8 byte) | ヘッダ長 (uint32 LE) | ヘッダ JSON (UTF-8) | 64 byte 境界に揃えた配列データ…
+# ヘッダには文字列項目 (大学名・学部名・二次科目名) と各配列の dtype / shape / offset、
+# 元 JSON の sha256 を持つ。元データが更新されていれば自動で作り直す。
+import hashlib
+import json
+import os
+import struct
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from kyodai.data import DEFAULT_YEAR, dataset_path, read_dataset
+from kyodai.engine import FacultyTable, compile_table
+
+MAGIC = b"KYODAI\x00\x02"
+_ALIGN = 64
+ARRAY_FIELDS = (
+    "weights", "center_max", "secondary_max", "pass_score_mean", "is_science",
+    "univ_code", "secondary_points", "base_weights", "eng_rule",
+)
+
+
+def cache_dir():
+    return Path(os.environ.get("KYODAI_CACHE_DIR", Path.home() / ".cache" / "kyodai"))
+
+
+def snapshot_path(year):
+    return cache_dir() / f"admissions-{year}.kyd"
+
+
+def _source_digest(year):
+    return hashlib.sha256(dataset_path(year).read_bytes()).hexdigest()
+
+
+def write(table, path, source_digest=""):
+    arrays = {name: np.ascontiguousarray(getattr(table, name)) for name in ARRAY_FIELDS}
+    specs, offset = {}, 0
+    for name, arr in arrays.items():
+        offset = -(-offset // _ALIGN) * _ALIGN
+        specs[name] = {"dtype": arr.dtype.str, "shape": list(arr.shape), "offset": offset}
+        offset += arr.nbytes
+
+    header = json.dumps({
+        "year": table.year,
+        "version": table.version,
+        "source_sha256": source_digest,
+        "keys": table.keys,
+        "univs": table.univs,
+        "secondary_names": table.secondary_names,
+        "arrays": specs,
+    }, ensure_ascii=False).encode("utf-8")
+    prefix = len(MAGIC) + 4 + len(header)
+    data_start = -(-prefix // _ALIGN) * _ALIGN
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # 複数プロセスが同時に作っても壊れないよう、一時ファイルから rename する
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(MAGIC)
+            f.write(struct.pack("<I", len(header)))
+            f.write(header)
+            for name, arr in arrays.items():
+                f.seek(data_start + specs[name]["offset"])
+                f.write(arr.tobytes())
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _read_header(path):
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path}: スナップショットの形式が違います")
+        (size,) = struct.unpack("<I", f.read(4))
+        header = json.loads(f.read(size).decode("utf-8"))
+    prefix = len(MAGIC) + 4 + size
+    return header, -(-prefix // _ALIGN) * _ALIGN
+
+
+def read(path):
+    header, data_start = _read_header(path)
+    buf = np.memmap(path, dtype=np.uint8, mode="r")
+    arrays = {}
+    for name, spec in header["arrays"].items():
+        dtype = np.dtype(spec["dtype"])
+        count = int(np.prod(spec["shape"], dtype=np.int64))
+        start = data_start + spec["offset"]
+        arrays[name] = buf[start:start + count * dtype.itemsize].view(dtype).reshape(spec["shape"])
+    return FacultyTable(
+        year=header["year"],
+        version=header["version"],
+        keys=tuple(tuple(k) for k in header["keys"]),
+        univs=tuple(header["univs"]),
+        secondary_names=tuple(tuple(n) for n in header["secondary_names"]),
+        **arrays,
+    )
+
+
+def build(year=DEFAULT_YEAR, path=None):
+    doc = read_dataset(dataset_path(year))
+    digest = _source_digest(year)
+    doc_year = doc.get("year", year)
+    table = compile_table(doc["universities"], year=doc_year, version=f"{doc_year}-{digest[:12]}")
+    path = path or snapshot_path(year)
+    write(table, path, digest)
+    return path
+
+
+def is_fresh(year=DEFAULT_YEAR, path=None):
+    path = Path(path or snapshot_path(year))
+    if not path.exists():
+        return False
+    try:
+        header, _ = _read_header(path)
+    except (OSError, ValueError):
+        return False
+    return header.get("source_sha256") == _source_digest(year)
+
+
+def load(year=DEFAULT_YEAR):
+    path = snapshot_path(year)
+    if not is_fresh(year, path):
+        build(year, path)
+    return read(path)
@@ -0,0 +1,149 @@
+# ==========================================
+# ページ間で共有する Streamlit 部品
+# ==========================================
+import hmac
+import os
+import re
+import uuid
+
+import streamlit as st
+
+from kyodai.data import DEFAULT_YEAR, available_years
+from kyodai.engine import center_vector, get_table
+from kyodai.history import HistoryStore
+
+
+@st.cache_resource
+def load_table(year=DEFAULT_YEAR):
+    # 配列化した学部テーブルはプロセス内の全セッションで共有する
+    return get_table(year)
+
+
+@st.cache_resource
+def load_history_store():
+    return HistoryStore()
+
+
+# ==========================================
+# 管理者用の画面 (キャッシュ管理・集計ダッシュボード・?debug=1 の計測)
+# ==========================================
+# KYODAI_ADMIN_TOKEN が未設定なら誰にも開かない。一度トークンが通ればセッション内で共有する
+ADMIN_KEY = "admin_authorized"
+
+
+def is_admin():
+    return bool(st.session_state.get(ADMIN_KEY))
+
+
+def admin_login(entered):
+    # トークンが一致すればこのセッションを管理者として記録する
+    token = os.environ.get("KYODAI_ADMIN_TOKEN")
+    if not token or not entered or not hmac.compare_digest(entered.encode(), token.encode()):
+        return False
+    st.session_state[ADMIN_KEY] = True
+    return True
+
+
+def require_admin():
+    # 管理者用ページの先頭で呼ぶ。通らなければ st.stop() でページの残りを実行しない
+    if not os.environ.get("KYODAI_ADMIN_TOKEN"):
+        st.error("管理者トークン (環境変数 KYODAI_ADMIN_TOKEN) が設定されていないため、このページは使えません。")
+        st.stop()
+    if is_admin():
+        return
+    if not admin_login(st.text_input("管理者トークン", type="password")):
+        st.stop()
+
+
+OWNER_KEY = "history_owner"
+_OWNER_RE = re.compile(r"^[0-9a-f]{32}$")
+
+
+def history_owner_id():
+    # 履歴の持ち主 ID。セッションごとに新しく作り、URL には載せない
+    # (URL を共有すると全員が同じ履歴を読み書きしてしまうため)。
+    # 後日・別の端末で続けるときは history_resume_form の続きコードで明示的に引き継ぐ
+    if OWNER_KEY not in st.session_state:
+        st.session_state[OWNER_KEY] = uuid.uuid4().hex
+    return st.session_state[OWNER_KEY]
+
+
+def history_resume_form():
+    # 続きコードの表示と入力。以前の ?uid= 付き URL は自動では使わず、入力欄に入れておくだけ
+    legacy_uid = st.query_params.get("uid")
+    if legacy_uid is not None:
+        del st.query_params["uid"]
+        st.session_state.setdefault("history_resume_code", legacy_uid)
+
+    with st.expander("履歴を後で続きから使う", expanded=legacy_uid is not None):
+        if legacy_uid is not None:
+            st.info("URL の uid では履歴を引き継がなくなりました。ご自分の履歴であれば、下のボタンで呼び出してください。")
+        st.caption("この続きコードを控えておくと、後日や別の端末で同じ履歴を呼び出せます。他の人には教えないでください。")
+        st.code(st.session_state[OWNER_KEY], language=None)
+        code = st.text_input("続きコードを入力", key="history_resume_code")
+        if st.button("この続きコードの履歴を使う", key="history_resume"):
+            code = code.strip().lower()
+            if not _OWNER_RE.match(code):
+                st.error("続きコードの形式が正しくありません (英数字 32 文字)。")
+                return
+            st.session_state[OWNER_KEY] = code
+            st.session_state["history_page"] = 1
+            st.rerun()
+
+
+def year_selector():
+    # 入試年度の選択 (データが複数年度あるときだけサイドバーに表示)
+    years = available_years()
+    if len(years) <= 1:
+        return years[0] if years else DEFAULT_YEAR
+    default = years.index(DEFAULT_YEAR) if DEFAULT_YEAR in years else len(years) - 1
+    return st.sidebar.selectbox("入試年度", years, index=default, key="exam_year")
+
+
+def center_score_form(is_science_univ):
+    # 共通テスト素点の入力フォーム。換算エンジン用の素点ベクトルを返す
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("##### 国数英")
+        val_jap = st.number_input("国語 (200)", 0, 200, 160)
+        val_m1 = st.number_input("数学IA (100)", 0, 100, 70)
+        val_m2 = st.number_input("数学IIBC (100)", 0, 100, 70)
+        st.markdown("---")
+        st.markdown("##### 英語 (R/L)")
+        val_eng_r = st.number_input("リーディング (100)", 0, 100, 85)
+        val_eng_l = st.number_input("リスニング (100)", 0, 100, 75)
+
+    with col2:
+        if is_science_univ:
+            # --- 理系用フォーム ---
+            st.markdown("##### 地歴公民・理科 (理系)")
+            st.info("理系：地歴1科目、理科2科目")
+
+            val_soc_s = st.number_input("地歴公民 (100)", 0, 100, 80, key="soc_s")
+            val_sci1 = st.number_input("理科 第1解答科目 (100)", 0, 100, 75, key="sci1")
+            val_sci2 = st.number_input("理科 第2解答科目 (100)", 0, 100, 75, key="sci2")
+
+            val_soc_total = val_soc_s
+            val_sci_total = val_sci1 + val_sci2
+
+        else:
+            # --- 文系用フォーム ---
+            st.markdown("##### 地歴公民・理科 (文系)")
+            st.success("文系：地歴2科目、理科基礎(または専門1)")
+
+            val_soc1 = st.number_input("地歴公民 ① (100)", 0, 100, 85, key="soc1")
+            val_soc2 = st.number_input("地歴公民 ② (100)", 0, 100, 80, key="soc2")
+            val_sci_base = st.number_input("理科 (基礎2 or 専門1) (100)", 0, 100, 80, key="sci_base")
+
+            val_soc_total = val_soc1 + val_soc2
+            val_sci_total = val_sci_base
+
+        st.markdown("---")
+        st.markdown("##### 情報")
+        val_info = st.number_input("情報I (100)", 0, 100, 80)
+
+    return center_vector(
+        jap=val_jap, m1=val_m1, m2=val_m2,
+        eng_r=val_eng_r, eng_l=val_eng_l,
+        soc=val_soc_total, sci=val_sci_total, info=val_info,
+    )
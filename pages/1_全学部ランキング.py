@@ -0,0 +1,64 @@
+import streamlit as st
+
+from kyodai.passdist import get_distribution
+from kyodai.ranking import rank_faculties
+from kyodai.ui import center_score_form, load_table, year_selector
+
+st.set_page_config(page_title="全学部ランキング", layout="centered")
+
+table = load_table(year_selector())
+pass_dist = get_distribution(table.year)
+
+st.title("どこまで届く？ 全学部ランキング")
+st.caption("共通テストの自己採点を一度入力すると、全学部を二次試験の必要得点率が低い順に並べます。")
+
+# 1. 文系・理系の選択 (入力フォームと対象学部が切り替わる)
+track = st.radio("受験区分", ["文系", "理系"], horizontal=True)
+is_science = track == "理系"
+
+# 2. 共通テスト入力
+st.subheader("共通テスト自己採点")
+x = center_score_form(is_science)
+
+# 3. 絞り込み・ランキング (フィルタ変更ではこの部分だけ再実行)
+@st.fragment
+def ranking_section(table, x, is_science, pass_dist):
+    st.divider()
+    st.subheader("絞り込み")
+    c_uni, c_ratio = st.columns(2)
+    with c_uni:
+        univ_options = [u for u in table.univs if ("理系" in u) == is_science]
+        selected_univs = st.multiselect("大学", univ_options, default=univ_options)
+    with c_ratio:
+        max_ratio = st.slider("二次必要得点率の上限 (%)", 0, 100, 100, step=5)
+
+    # 過去の合格者データがあれば、想定する二次得点率での位置も出す
+    secondary_ratio = None
+    if pass_dist.points.size:
+        secondary_ratio = st.slider("二次の想定得点率 (%)", 0, 100, 60, step=5) / 100
+
+    # 4. ランキング
+    df_rank = rank_faculties(
+        table, x,
+        is_science=is_science,
+        univs=selected_univs,
+        max_required_ratio=max_ratio / 100,
+        pass_dist=pass_dist,
+        secondary_ratio=secondary_ratio,
+    )
+
+    if df_rank.empty:
+        st.warning("条件に合う学部がありません。")
+    else:
+        st.dataframe(
+            df_rank,
+            hide_index=True,
+            width="stretch",
+            column_config={
+                "必要得点率": st.column_config.ProgressColumn("必要得点率", format="%.1f%%", min_value=0, max_value=100),
+                "合格者内の位置": st.column_config.NumberColumn("合格者内の位置", format="%.0f%%"),
+            },
+        )
+
+
+ranking_section(table, x, is_science, pass_dist)
@@ -0,0 +1,72 @@
+import altair as alt
+import numpy as np
+import streamlit as st
+
+from kyodai.sensitivity import gain_long_frame, per_point_frame, sweep
+from kyodai.ui import center_score_form, load_table, year_selector
+
+st.set_page_config(page_title="感度分析", layout="wide")
+
+table = load_table(year_selector())
+
+st.title("どの 1 点が一番効く？ 感度分析")
+st.caption("学部ごとの配点から、共通テスト・二次試験の各科目で 1 点 (または k 点) 伸ばしたときに総合点がどれだけ増えるかを一覧にします。")
+
+# 1. 文系・理系の選択と共通テスト入力
+track = st.radio("受験区分", ["文系", "理系"], horizontal=True)
+is_science = track == "理系"
+
+st.subheader("共通テスト自己採点")
+x = center_score_form(is_science)
+
+# 2. スイープ (条件の変更ではこの部分だけ再実行)
+K_MAX = 50
+
+
+@st.fragment
+def sensitivity_section(table, x, is_science):
+    st.divider()
+    c_uni, c_k, c_ratio = st.columns(3)
+    with c_uni:
+        univ_options = [u for u in table.univs if ("理系" in u) == is_science]
+        selected_univs = st.multiselect("大学", univ_options, default=univ_options)
+    with c_k:
+        k = st.slider("伸ばす点数 k", 1, K_MAX, 10)
+    with c_ratio:
+        ratio = st.slider("二次の現在の得点率 (%)", 0, 100, 60, step=5,
+                          help="二次の各科目がこの得点率まで取れている前提で、残りを伸びしろとします。")
+
+    faculty_idx = [i for i, (univ, _) in enumerate(table.keys) if univ in selected_univs]
+    if not faculty_idx:
+        st.warning("大学を選んでください。")
+        return
+
+    # 全学部 × 全科目 × k = 1..K_MAX をまとめて計算 (キャッシュ済み)。k の変更はスライスするだけ
+    center, secondary = sweep(table, x, np.arange(1, K_MAX + 1), ratio / 100)
+
+    st.subheader("1 点あたりの増分")
+    st.caption("共通テストは換算後の点、二次は素点のまま加算されるので 1 点。英語 R/L は配点ルール込み。")
+    st.dataframe(per_point_frame(table, faculty_idx), hide_index=True, width="stretch")
+
+    st.subheader(f"各科目を +{k} 点したときの総合点の増分")
+    st.caption("満点までの残りで頭打ちにしています。")
+    df = gain_long_frame(table, faculty_idx, center, secondary, k - 1)
+    heatmap = (
+        alt.Chart(df)
+        .mark_rect()
+        .encode(
+            x=alt.X("科目:N", sort=None),
+            y=alt.Y("学部:N", sort=None),
+            color=alt.Color("増分:Q", scale=alt.Scale(scheme="blues")),
+            tooltip=["学部", "科目", alt.Tooltip("増分:Q", format=".1f")],
+        )
+    )
+    text = heatmap.mark_text(fontSize=10).encode(text=alt.Text("増分:Q", format=".0f"), color=alt.value("black"))
+    st.altair_chart(heatmap + text, width="stretch")
+
+    best = df.loc[df.groupby("学部", sort=False)["増分"].idxmax()]
+    st.subheader(f"+{k} 点が一番効く科目")
+    st.dataframe(best.rename(columns={"科目": "おすすめ科目"}), hide_index=True, width="stretch")
+
+
+sensitivity_section(table, x, is_science)
@@ -0,0 +1,90 @@
+from datetime import date, timedelta
+
+import pandas as pd
+import streamlit as st
+
+from kyodai.ui import load_history_store, require_admin
+
+st.set_page_config(page_title="集計ダッシュボード", layout="wide")
+
+st.title("集計ダッシュボード (先生用)")
+st.caption("全生徒が保存した計算履歴の集計です。集計は保存のたびに差分で更新されています。")
+
+# 全生徒の集計なので管理者のみ (KYODAI_ADMIN_TOKEN が未設定なら使えない)
+require_admin()
+
+history_store = load_history_store()
+stats = history_store.faculty_stats()
+if not stats:
+    st.info("まだ履歴が保存されていません。")
+    st.stop()
+
+# ==========================================
+# 1. 全体
+# ==========================================
+total = sum(s.n for s in stats)
+total_pass = sum(s.n_pass for s in stats)
+c1, c2, c3 = st.columns(3)
+c1.metric("保存件数", f"{total:,}")
+c2.metric("合格圏の割合", f"{total_pass / total * 100:.1f}%")
+c3.metric("志望先の学部数", len(stats))
+
+# ==========================================
+# 2. 学部ごとの共テ換算・合格圏率
+# ==========================================
+st.subheader("学部ごとの集計")
+st.dataframe(
+    pd.DataFrame([{
+        "大学": s.univ,
+        "学部": s.faculty,
+        "件数": s.n,
+        "合格圏": s.n_pass,
+        "不足": s.n - s.n_pass,
+        "合格圏率": round(s.pass_rate * 100, 1),
+        "共テ換算 平均": round(s.center_mean, 1),
+        "標準偏差": round(s.center_std, 1),
+        "最低": round(s.center_min, 1),
+        "最高": round(s.center_max, 1),
+    } for s in stats]),
+    hide_index=True,
+    width="stretch",
+    column_config={
+        "合格圏率": st.column_config.ProgressColumn("合格圏率", format="%.1f%%", min_value=0, max_value=100),
+    },
+)
+
+
+@st.fragment
+def distribution_section(history_store, stats):
+    st.subheader("共テ換算の分布")
+    labels = [f"{s.univ} / {s.faculty}" for s in stats]
+    pick = st.selectbox("学部", range(len(stats)), format_func=lambda i: labels[i])
+    s = stats[pick]
+    hist = history_store.center_histogram(s.univ, s.faculty)
+    df = pd.DataFrame(hist, columns=["共テ換算", "件数"]).set_index("共テ換算")
+    st.bar_chart(df)
+    st.caption(f"{s.n} 件 / 平均 {s.center_mean:.1f} / 合格圏 {s.pass_rate * 100:.1f}%")
+
+
+@st.fragment
+def trend_section(history_store):
+    st.subheader("人気の志望先の推移")
+    c_days, c_top = st.columns(2)
+    with c_days:
+        days = st.slider("期間 (日)", 7, 180, 30, step=1)
+    with c_top:
+        top_n = st.slider("表示する学部数", 1, 15, 5)
+    since = (date.today() - timedelta(days=days - 1)).isoformat()
+    rows = history_store.daily_counts(since)
+    if not rows:
+        st.info("この期間の履歴はありません。")
+        return
+    df = pd.DataFrame(rows, columns=["日付", "大学", "学部", "件数", "合格圏"])
+    df["志望先"] = df["大学"] + " / " + df["学部"]
+    top = df.groupby("志望先")["件数"].sum().nlargest(top_n).index
+    trend = df[df["志望先"].isin(top)].pivot_table(index="日付", columns="志望先", values="件数", aggfunc="sum", fill_value=0)
+    st.line_chart(trend)
+
+
+distribution_section(history_store, stats)
+trend_section(history_store)
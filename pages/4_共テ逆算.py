@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from kyodai.engine import CENTER_COLUMNS, CENTER_LABELS, RAW_CAP
+from kyodai.inverse import solve_center
+from kyodai.ui import load_table, year_selector
+
+st.set_page_config(page_title="共テ逆算", layout="wide")
+
+table = load_table(year_selector())
+
+st.title("共通テストは何点必要？ 逆算モード")
+st.caption("目標点と二次試験の見込みから、共通テストで必要な換算点と科目ごとの目安を全学部まとめて逆算します。")
+
+# 1. 文系・理系の選択 (地歴公民・理科の満点が切り替わる)
+track = st.radio("受験区分", ["文系", "理系"], horizontal=True)
+is_science = track == "理系"
+
+# 2. 条件 (変更ではこの部分だけ再実行)
+@st.fragment
+def inverse_section(table, is_science):
+    c_uni, c_margin, c_sec = st.columns(3)
+    with c_uni:
+        univ_options = [u for u in table.univs if ("理系" in u) == is_science]
+        selected_univs = st.multiselect("大学", univ_options, default=univ_options)
+    with c_margin:
+        margin = st.number_input("目標点 = 合格者平均点 + (点)", -100.0, 200.0, 0.0, step=5.0)
+    with c_sec:
+        sec_ratio = st.slider("二次試験の見込み得点率 (%)", 0, 100, 60, step=5)
+
+    idx = np.array([i for i, (u, _) in enumerate(table.keys) if u in selected_univs], dtype=np.intp)
+    if not idx.size:
+        st.warning("大学を選んでください。")
+        return
+
+    # 全学部を一度に解く
+    req = solve_center(table, target=table.pass_score_mean + margin, secondary=table.secondary_max * sec_ratio / 100)
+
+    st.subheader("学部ごとの必要点")
+    df = pd.DataFrame({
+        "大学": [table.keys[i][0] for i in idx],
+        "学部": [table.keys[i][1] for i in idx],
+        "必要な共テ換算": np.round(req.needed[idx], 1),
+        "共テ満点": table.center_max[idx],
+        "均等に取る場合の得点率": np.round(req.uniform_ratio[idx] * 100, 1),
+        "最少の素点合計": np.round(req.minimal[idx].sum(axis=1), 1),
+    })
+    st.dataframe(
+        df.sort_values("均等に取る場合の得点率", na_position="last"),
+        hide_index=True,
+        width="stretch",
+        column_config={
+            "均等に取る場合の得点率": st.column_config.ProgressColumn(
+                "均等に取る場合の得点率", format="%.1f%%", min_value=0, max_value=100
+            ),
+        },
+    )
+    if (~req.feasible[idx]).any():
+        st.caption("得点率が空欄の学部は、二次の見込みでは共通テスト満点でも目標点に届きません。")
+
+    # 3. 学部ごとの科目別の目安
+    st.subheader("科目ごとの目安")
+    labels = [f"{table.keys[i][0]} / {table.keys[i][1]}" for i in idx]
+    pick = st.selectbox("学部", range(len(idx)), format_func=lambda j: labels[j])
+    i = idx[pick]
+    if not req.feasible[i]:
+        st.error(f"共通テスト満点 ({table.center_max[i]:g}) でも必要な換算点 {req.needed[i]:.1f} に届きません。")
+        return
+
+    caps = RAW_CAP[bool(table.is_science[i])]
+    st.dataframe(
+        pd.DataFrame({
+            "科目": [f"{CENTER_LABELS[c]} (/{caps[s]})" for s, c in enumerate(CENTER_COLUMNS)],
+            "1 点あたりの換算": np.round(table.weights[i], 3),
+            "均等": np.round(req.uniform[i], 1),
+            "最少合計": np.round(req.minimal[i], 1),
+            "最低ライン": np.round(req.floor[i], 1),
+        }),
+        hide_index=True,
+        width="stretch",
+    )
+    st.caption(
+        "均等: 全科目を同じ得点率で取る場合 / 最少合計: 換算の大きい科目から埋めて素点の合計を最少にした場合 / "
+        "最低ライン: 他の科目がすべて満点のときに、その科目で最低限必要な点"
+    )
+
+
+inverse_section(table, is_science)
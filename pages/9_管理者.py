@@ -0,0 +1,47 @@
+import pandas as pd
+import streamlit as st
+
+from kyodai import cache
+from kyodai.ui import load_table, require_admin, year_selector
+
+st.set_page_config(page_title="管理者", layout="centered")
+
+st.title("管理者ページ")
+
+# KYODAI_ADMIN_TOKEN と一致するトークンを入力したときだけ表示する (未設定なら使えない)
+require_admin()
+
+table = load_table(year_selector())
+st.caption(f"データ版: {table.version} ({len(table.univs)} 大学 / {len(table)} 学部)")
+
+# ==========================================
+# 計算結果キャッシュ (全セッション共有)
+# ==========================================
+st.subheader("計算結果キャッシュ")
+stats = cache.all_stats()
+if not stats:
+    st.info("まだキャッシュが使われていません。")
+else:
+    st.dataframe(
+        pd.DataFrame([{
+            "キャッシュ": s.name,
+            "件数": f"{s.size} / {s.maxsize}",
+            "ヒット": s.hits,
+            "ミス": s.misses,
+            "追い出し": s.evictions,
+            "ヒット率": f"{s.hit_rate * 100:.1f}%",
+        } for s in stats]),
+        hide_index=True, width="stretch",
+    )
+
+    c_clear, c_reset = st.columns(2)
+    with c_clear:
+        if st.button("キャッシュを空にする"):
+            for s in stats:
+                cache.get_cache(s.name).clear()
+            st.rerun()
+    with c_reset:
+        if st.button("カウンタをリセット"):
+            for s in stats:
+                cache.get_cache(s.name).reset_stats()
+            st.rerun()